@@ -0,0 +1,95 @@
+import asyncio
+import os
+
+from model import FlverModel
+
+
+class FileFetcher:
+    """
+    Reads whole files into memory a chunk at a time, each chunk in a worker thread, so the event loop keeps
+    other transfers going while one waits on storage.
+    """
+    def __init__(self, chunkSize=4 * 1024 * 1024):
+        self.chunkSize = chunkSize
+
+    async def __call__(self, path):
+        stream = await asyncio.to_thread(open, path, 'rb', buffering=0)
+        try:
+            size = await asyncio.to_thread(lambda: os.fstat(stream.fileno()).st_size)
+            buffer = bytearray(size)
+            view = memoryview(buffer)
+            offset = 0
+            while offset < size:
+                count = await self.read_chunk(stream, view[offset:offset + self.chunkSize])
+                if not count:
+                    break
+                offset += count
+        finally:
+            await asyncio.to_thread(stream.close)
+        # a bytearray with exported views cannot be resized
+        view.release()
+        if offset < size:
+            del buffer[offset:]
+        return buffer
+
+    async def read_chunk(self, stream, view):
+        return await asyncio.to_thread(stream.readinto, view)
+
+
+class LatencyFetcher(FileFetcher):
+    """
+    Local stand-in for network storage: every chunk waits `latency` seconds before being read.
+    """
+    def __init__(self, latency=0.05, chunkSize=1024 * 1024):
+        super().__init__(chunkSize)
+        self.latency = latency
+
+    async def read_chunk(self, stream, view):
+        await asyncio.sleep(self.latency)
+        return await super().read_chunk(stream, view)
+
+
+def parse_model(path, buffer, load):
+    model = FlverModel(buffer)
+    model.path = path
+    if load:
+        model.load()
+    return model
+
+
+async def import_models(paths, limit=8, fetcher=None, load=False):
+    """
+    Asynchronously fetch and parse the FLVER files of `paths`, yielding `(path, model, error)` as each one
+    completes, with exactly one of `model` and `error` set. At most `limit` files are fetched or parsed at the same
+    time and at most `limit` parsed models wait for the consumer. `fetcher` is an async callable returning the
+    contents of a path, `FileFetcher` by default; with `load` the meshes are decoded before the model is yielded.
+    """
+    if fetcher is None:
+        fetcher = FileFetcher()
+    pending = iter(paths)
+    results = asyncio.Queue(maxsize=limit)
+    done = object()
+
+    async def worker():
+        for path in pending:
+            try:
+                buffer = await fetcher(path)
+                result = (path, await asyncio.to_thread(parse_model, path, buffer, load), None)
+            except Exception as error:
+                result = (path, None, error)
+            await results.put(result)
+        await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for i in range(max(limit, 1))]
+    try:
+        running = len(workers)
+        while running:
+            result = await results.get()
+            if result is done:
+                running -= 1
+            else:
+                yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from model import FlverModel
+from reader import BufferLayoutMember
+from writer import FlverSpec, write_flver
+
+LEGACY_LAYOUT = [
+    (BufferLayoutMember.Float3, BufferLayoutMember.Position),
+    (BufferLayoutMember.Float4, BufferLayoutMember.Normal),
+    (BufferLayoutMember.Short4toFloat4A, BufferLayoutMember.BoneWeights),
+    (BufferLayoutMember.ShortBoneIndices, BufferLayoutMember.BoneIndices),
+    (BufferLayoutMember.Float2, BufferLayoutMember.UVSemantic),
+    (BufferLayoutMember.Float4, BufferLayoutMember.VertexColor),
+]
+
+SCENARIOS = {
+    'character': dict(meshCount=8, boneCount=120, materialCount=8, texturesPerMaterial=3, dummyCount=16,
+                      vertexCount=20000, indexCount=60000),
+    'character-big-endian': dict(endianness='big', meshCount=8, boneCount=120, materialCount=8,
+                                 texturesPerMaterial=3, dummyCount=16, vertexCount=20000, indexCount=60000),
+    'map-piece': dict(meshCount=4, boneCount=1, materialCount=4, texturesPerMaterial=4, vertexCount=60000,
+                      indexCount=180000, indexSize=32, faceSetFlags=(0, 0x01000000, 0x02000000)),
+    'legacy': dict(version=0x20009, meshCount=8, boneCount=60, materialCount=8, vertexCount=10000,
+                   indexCount=30000, layouts=[LEGACY_LAYOUT]),
+    'tables': dict(meshCount=200, boneCount=800, materialCount=200, texturesPerMaterial=4, dummyCount=200,
+                   vertexCount=64, indexCount=96, gxSections=8),
+}
+
+STAGES = ('tables', 'indices', 'vertices')
+
+
+def measure(data):
+    """
+    Parse `data` once, returning the seconds and bytes spent on each stage.
+    """
+    start = time.perf_counter()
+    model = FlverModel(data)
+    tables = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for faceSet in model.faceSets:
+        model.load_indices(faceSet)
+    indices = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for mesh in model.meshes:
+        model.load_vertices(mesh)
+    vertices = time.perf_counter() - start
+
+    sizes = {
+        'tables': model.dataOffset,
+        'indices': sum(faceSet.vertexSize for faceSet in model.faceSets),
+        'vertices': sum(vertexBuffer.vertexSize * vertexBuffer.vertexCount for vertexBuffer in model.vertexBuffers),
+    }
+    model.close()
+    return {'tables': tables, 'indices': indices, 'vertices': vertices}, sizes
+
+
+def run_scenario(name, repeat, scale=1.0):
+    options = dict(SCENARIOS[name])
+    for key in ('vertexCount', 'indexCount'):
+        options[key] = max(3, int(options[key] * scale))
+    data = write_flver(FlverSpec(**options))
+
+    best = None
+    sizes = None
+    for i in range(repeat):
+        times, sizes = measure(data)
+        best = times if best is None else {stage: min(best[stage], times[stage]) for stage in STAGES}
+
+    throughput = {stage: sizes[stage] / best[stage] / (1024 * 1024) for stage in STAGES}
+    throughput['total'] = len(data) / sum(best.values()) / (1024 * 1024)
+    return throughput
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Measure FLVER parse throughput on synthetic files.',
+        epilog='The results are compared against the baseline, benchmark_baseline.json next to this script unless '
+               '--baseline names another file, and the exit status is 1 when a stage got slower than the tolerance '
+               'allows. The committed baseline was recorded with the default --repeat and --scale; throughput depends '
+               'on the machine, so record a baseline where the checks run with --save (only the scenarios run are '
+               'replaced) and compare at the same --scale.')
+    parser.add_argument('scenarios', nargs='*', default=sorted(SCENARIOS), help='scenarios to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per scenario, the best one is kept')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier applied to vertex and index counts')
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json'),
+                        help='baseline file to compare against or save to')
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before reporting a regression')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as stream:
+            baseline = json.load(stream)
+
+    results = {}
+    regressions = []
+    print('{:<24}{:>12}{:>12}{:>12}{:>12}  (MB/s)'.format('scenario', *STAGES, 'total'))
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario {}, expected one of {}'.format(name, ', '.join(sorted(SCENARIOS))))
+        results[name] = throughput = run_scenario(name, args.repeat, args.scale)
+        cells = []
+        for stage in STAGES + ('total',):
+            cell = '{:.1f}'.format(throughput[stage])
+            reference = baseline.get(name, {}).get(stage)
+            if reference is not None and not args.save:
+                change = throughput[stage] / reference - 1
+                cell += ' {:+.0%}'.format(change)
+                if change < -args.tolerance:
+                    regressions.append('{} {}: {:.1f} MB/s, baseline {:.1f} MB/s'.format(name, stage, throughput[stage], reference))
+            cells.append(cell)
+        print('{:<24}{:>12}{:>12}{:>12}{:>12}'.format(name, *cells))
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as stream:
+            json.dump(baseline, stream, indent=2, sort_keys=True)
+        print('Baseline saved to {}'.format(args.baseline))
+    elif regressions:
+        print('Regressions over {:.0%}:'.format(args.tolerance), file=sys.stderr)
+        for regression in regressions:
+            print('  ' + regression, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
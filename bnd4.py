@@ -0,0 +1,222 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dcx import open_source, peek
+from model import FlverModel
+from reader import BinaryReader, Record, StringPool
+
+MAGIC = b'BND4'
+FLVER_MAGIC = b'FLVER\x00'
+
+
+def is_archive_name(path):
+    """
+    Whether `path` is named like a BND4 archive (.bnd, .chrbnd, .partsbnd..., DCX compressed or not).
+    """
+    name = os.fspath(path).lower()
+    if name.endswith('.dcx'):
+        name = name[:-4]
+    return name.endswith('bnd')
+
+
+class Bnd4Format:
+    """
+    Bits of the BND4 format byte, telling which fields the file headers hold.
+    """
+    BigEndian = 0x01
+    IDs = 0x02
+    Names1 = 0x04
+    Names2 = 0x08
+    LongOffsets = 0x10
+    Compression = 0x20
+
+    @staticmethod
+    def reverse_bits(value):
+        return int('{:08b}'.format(value)[::-1], 2)
+
+    @classmethod
+    def decode(cls, raw, bitBigEndian):
+        """
+        Format or file flags byte as stored, whose bit order depends on the archive and on the byte itself.
+        """
+        if bitBigEndian or (raw & 0x01 and not raw & 0x80):
+            return raw
+        return cls.reverse_bits(raw)
+
+
+class Bnd4Records:
+    cache = {}
+
+    def __init__(self, endian):
+        self.endian = endian
+        self.header = Record(endian, '4s??BBB??Biq8sqq?BBBiq', (3, 4, 5, 8, 17, 18),
+                             [(10, (0x40,)), (16, (0, 1, 4, 0x80))], name='bnd4Header')
+        self.fileHeaders = {}
+
+    @classmethod
+    def get(cls, endian):
+        records = cls.cache.get(endian)
+        if records is None:
+            records = cls.cache[endian] = cls(endian)
+        return records
+
+    def fileHeader(self, format):
+        record = self.fileHeaders.get(format)
+        if record is None:
+            fmt = 'BBBBiq'
+            if format & Bnd4Format.Compression:
+                fmt += 'q'
+            fmt += 'q' if format & Bnd4Format.LongOffsets else 'I'
+            if format & Bnd4Format.IDs:
+                fmt += 'i'
+            if format & (Bnd4Format.Names1 | Bnd4Format.Names2):
+                fmt += 'i'
+            reserved = [1, 2, 3]
+            if format == Bnd4Format.Names1:
+                fmt += 'ii'
+                reserved.append(len(fmt) - 1)
+            record = self.fileHeaders[format] = Record(self.endian, fmt, reserved, [(4, (-1,))], name='bnd4File')
+        return record
+
+
+class Bnd4Entry:
+    __slots__ = ('index', 'id', 'name', 'flags', 'dataOffset', 'compressedSize', 'uncompressedSize')
+
+    def __init__(self):
+        self.index = 0
+        self.id = -1
+        self.name = None
+        self.flags = 0
+        self.dataOffset = 0
+        self.compressedSize = 0
+        self.uncompressedSize = -1
+
+
+class Bnd4Archive:
+    """
+    A BND4 archive whose file table is parsed when it is opened. The archive is memory-mapped (or inflated in
+    memory when it is DCX compressed) and `data` hands out zero-copy slices of its members, so the FLVERs it
+    bundles are parsed straight from the archive without being extracted.
+    """
+    def __init__(self, source, decompressor=None):
+        self.stream = None
+        if isinstance(source, (str, os.PathLike)):
+            self.path = source
+            self.stream = source = open(source, 'rb')
+        else:
+            self.path = getattr(source, 'name', None)
+
+        try:
+            source = open_source(source, decompressor)
+            start = peek(source, 16)
+            if start[0:4] != MAGIC:
+                raise Exception('Not a BND4 archive: expected {}, got {}'.format(MAGIC, start[0:4]))
+            self.reader = BinaryReader(source, 'big' if start[9] else 'little')
+            self.read_tables()
+        except Exception:
+            if self.stream is not None:
+                self.stream.close()
+            raise
+
+    def read_tables(self):
+        br = self.reader
+        br.seek(0)
+        values = br.read_records(Bnd4Records.get(br.endian()).header, 1)[0]
+        self.bigEndian = values[6]
+        self.bitBigEndian = not values[7]
+        fileCount = values[9]
+        self.version = values[11].rstrip(b'\x00').decode('ascii', 'replace')
+        fileHeaderSize = values[12]
+        self.unicode = values[14]
+        self.format = Bnd4Format.decode(values[15], self.bitBigEndian)
+        self.extended = values[16]
+
+        record = Bnd4Records.get(br.endian()).fileHeader(self.format)
+        if fileHeaderSize != record.codec.size:
+            raise Exception('Unexpected BND4 file header size {} for format 0x{:02X}, expected {}'.format(
+                fileHeaderSize, self.format, record.codec.size))
+        names = br.strings if self.unicode else StringPool(br.buffer, 'shift_jis', 1)
+
+        hasIDs = self.format & Bnd4Format.IDs
+        hasNames = self.format & (Bnd4Format.Names1 | Bnd4Format.Names2)
+        self.entries = []
+        for index, values in enumerate(br.read_records(record, fileCount)):
+            entry = Bnd4Entry()
+            entry.index = index
+            entry.flags = Bnd4Format.decode(values[0], self.bitBigEndian)
+            entry.compressedSize = values[5]
+            field = 6
+            if self.format & Bnd4Format.Compression:
+                entry.uncompressedSize = values[field]
+                field += 1
+            entry.dataOffset = values[field]
+            field += 1
+            if hasIDs:
+                entry.id = values[field]
+                field += 1
+            if hasNames:
+                entry.name = names.get(values[field])
+                field += 1
+            if self.format == Bnd4Format.Names1:
+                entry.id = values[field]
+            self.entries.append(entry)
+
+    def data(self, entry):
+        """
+        Zero-copy slice of the stored contents of `entry`, still DCX compressed if the member is.
+        """
+        return self.reader.get_bytes(entry.dataOffset, entry.compressedSize)
+
+    def is_flver(self, entry):
+        if entry.name is not None:
+            name = entry.name.lower()
+            return name.endswith('.flver') or name.endswith('.flver.dcx')
+        start = bytes(self.data(entry)[0:6])
+        return start == FLVER_MAGIC or start[0:4] == b'DCX\x00'
+
+    def flvers(self):
+        return [entry for entry in self.entries if self.is_flver(entry)]
+
+    def open_model(self, entry, instrumentation=None, validation=None, precision=None):
+        """
+        `FlverModel` parsing the member `entry` in place.
+        """
+        model = FlverModel(self.data(entry), instrumentation, validation, precision=precision)
+        model.path = '{}:{}'.format(self.path, entry.name if entry.name is not None else entry.index)
+        return model
+
+    def load_models(self, entries=None, workers=None, instrumentation=None, validation=None, precision=None,
+                    faceSets=None):
+        """
+        Parse and fully decode the FLVER members, or only `entries`, with a pool of `workers` threads when given,
+        each member being decoded by one thread. `faceSets` are the `FlverModel.select_face_sets` criteria the
+        face sets to decode must match.
+
+        Returns:
+            list: the loaded `FlverModel` of every member, in archive order.
+        """
+        if entries is None:
+            entries = self.flvers()
+
+        def load(entry):
+            model = self.open_model(entry, instrumentation, validation, precision)
+            if faceSets is not None:
+                model.select_face_sets(**faceSets)
+            return model.load()
+
+        if workers is not None and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(load, entries))
+        return [load(entry) for entry in entries]
+
+    def close(self):
+        self.reader.close()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
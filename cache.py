@@ -0,0 +1,201 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from model import FlverModel
+from reader import AttributeFormat, FaceSet, Mesh, VertexData, READER_VERSION
+
+MAGIC = b'FLVC'
+ALIGNMENT = 16
+
+
+def file_digest(path):
+    """
+    SHA-256 hex digest of the contents of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MeshCache:
+    """
+    On-disk cache of decoded meshes, keyed by the content hash of the FLVER file and the reader version.
+    Every entry is a single file holding a JSON manifest followed by the raw attribute and index buffers; entries
+    are memory-mapped back so a hit never parses the FLVER. The least recently used entries are evicted once the
+    cache grows over `maxSize` bytes. Meshes are decoded in the vertex attribute `precision` given, which is part
+    of the keys.
+    """
+    def __init__(self, directory, maxSize=1024 * 1024 * 1024, precision=None):
+        self.directory = directory
+        self.maxSize = maxSize
+        self.precision = AttributeFormat.normalize(precision)
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, path, digest=None):
+        key = '{}-{}'.format(digest if digest is not None else file_digest(path), READER_VERSION)
+        if self.precision:
+            key += '-' + hashlib.sha256(repr(self.precision).encode()).hexdigest()[:16]
+        return key
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + '.flvc')
+
+    def load(self, path, key=None):
+        """
+        Decoded meshes of the FLVER at `path`, from the cache when possible, parsed and stored otherwise. `key`
+        saves hashing the file again when the caller already did.
+        """
+        if key is None:
+            key = self.key(path)
+        meshes = self.get(key)
+        if meshes is None:
+            with FlverModel(path, precision=self.precision) as model:
+                meshes = model.load().meshes
+            self.put(key, meshes)
+        return meshes
+
+    def get(self, key):
+        entryPath = self.entry_path(key)
+        try:
+            with open(entryPath, 'rb') as stream:
+                mapping = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(entryPath)
+        except (OSError, ValueError):
+            return None
+
+        buffer = memoryview(mapping)
+        if bytes(buffer[0:4]) != MAGIC:
+            return None
+        manifestSize = struct.unpack_from('<I', buffer, 4)[0]
+        manifest = json.loads(bytes(buffer[8:8 + manifestSize]))
+        if manifest['byteorder'] != sys.byteorder:
+            return None
+        dataOffset = 8 + manifestSize
+        dataOffset += -dataOffset % ALIGNMENT
+
+        def view(entry):
+            if entry is None:
+                return None
+            offset, typecode, length = entry
+            return buffer[dataOffset + offset:dataOffset + offset + length].cast(typecode)
+
+        meshes = []
+        for meshEntry in manifest['meshes']:
+            mesh = Mesh()
+            mesh.dynamic = meshEntry['dynamic']
+            mesh.materialIndex = meshEntry['materialIndex']
+            mesh.defaultBoneIndex = meshEntry['defaultBoneIndex']
+            mesh.boneIndices = view(meshEntry['boneIndices'])
+            vertexEntry = meshEntry['vertexData']
+            vertexData = VertexData(vertexEntry['vertexCount'])
+            for name in ('positions', 'normals', 'boneWeights', 'boneIndices'):
+                setattr(vertexData, name, view(vertexEntry[name]))
+            for name in ('uvs', 'tangents', 'colors'):
+                setattr(vertexData, name, [view(entry) for entry in vertexEntry[name]])
+            for name, channel, format in vertexEntry['formats']:
+                vertexData.formats[name if channel is None else (name, channel)] = AttributeFormat.from_list(format)
+            mesh.vertexData = vertexData
+            for faceSetEntry in meshEntry['faceSets']:
+                faceSet = FaceSet()
+                faceSet.flags = faceSetEntry['flags']
+                faceSet.triangleStrip = faceSetEntry['triangleStrip']
+                faceSet.cullBackfaces = faceSetEntry['cullBackfaces']
+                faceSet.indexSize = faceSetEntry['indexSize']
+                faceSet.vertices = view(faceSetEntry['vertices'])
+                faceSet.vertexCount = len(faceSet.vertices)
+                mesh.faceSets.append(faceSet)
+            meshes.append(mesh)
+        return meshes
+
+    def put(self, key, meshes):
+        blobs = []
+        size = 0
+
+        def add(values):
+            nonlocal size
+            if values is None:
+                return None
+            values = memoryview(values)
+            entry = [size, values.format, values.nbytes]
+            blobs.append(values)
+            size += values.nbytes + (-values.nbytes % ALIGNMENT)
+            return entry
+
+        meshEntries = []
+        for mesh in meshes:
+            vertexData = mesh.vertexData
+            meshEntry = {
+                'dynamic': mesh.dynamic,
+                'materialIndex': mesh.materialIndex,
+                'defaultBoneIndex': mesh.defaultBoneIndex,
+                'boneIndices': add(array('i', mesh.boneIndices)),
+                'vertexData': {'vertexCount': vertexData.vertexCount},
+                'faceSets': [],
+            }
+            for name in ('positions', 'normals', 'boneWeights', 'boneIndices'):
+                meshEntry['vertexData'][name] = add(getattr(vertexData, name))
+            for name in ('uvs', 'tangents', 'colors'):
+                meshEntry['vertexData'][name] = [add(values) for values in getattr(vertexData, name)]
+            meshEntry['vertexData']['formats'] = [
+                [key, None, format.to_list()] if isinstance(key, str) else [key[0], key[1], format.to_list()]
+                for key, format in vertexData.formats.items()]
+            for faceSet in mesh.faceSets:
+                meshEntry['faceSets'].append({
+                    'flags': faceSet.flags,
+                    'triangleStrip': faceSet.triangleStrip,
+                    'cullBackfaces': faceSet.cullBackfaces,
+                    'indexSize': faceSet.indexSize,
+                    'vertices': add(faceSet.vertices),
+                })
+            meshEntries.append(meshEntry)
+
+        manifest = json.dumps({'byteorder': sys.byteorder, 'meshes': meshEntries}).encode()
+        header = MAGIC + struct.pack('<I', len(manifest)) + manifest
+        header += bytes(-len(header) % ALIGNMENT)
+
+        descriptor, temporaryPath = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as stream:
+                stream.write(header)
+                for blob in blobs:
+                    stream.write(blob)
+                    stream.write(bytes(-blob.nbytes % ALIGNMENT))
+            os.replace(temporaryPath, self.entry_path(key))
+        except BaseException:
+            os.unlink(temporaryPath)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in `maxSize`.
+        """
+        entries = []
+        totalSize = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.flvc'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            totalSize += stat.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if totalSize <= self.maxSize:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            totalSize -= size
@@ -0,0 +1,136 @@
+import struct
+import zlib
+
+MAGIC = b'DCX\x00'
+
+
+class DcxHeader:
+    """
+    Header of a DFLT DCX container: a big-endian description of the zlib stream following it at `dataOffset`.
+    """
+    codec = struct.Struct('>4s5i4sII4s4si4B4i4si')
+
+    def __init__(self, data):
+        if len(data) < self.codec.size:
+            raise Exception('Truncated DCX header: expected {} bytes, got {}'.format(self.codec.size, len(data)))
+        values = self.codec.unpack_from(data)
+        if values[0] != MAGIC:
+            raise Exception('Not a DCX file: expected {}, got {}'.format(MAGIC, values[0]))
+        self.version = values[1]
+        self.format = values[10].decode('ascii', 'replace')
+        if self.format != 'DFLT':
+            raise Exception('Unsupported DCX compression {}, only DFLT is handled'.format(self.format))
+        if values[1] not in (0x10000, 0x11000) or values[6] != b'DCS\x00' or values[9] != b'DCP\x00' or \
+                values[20] != b'DCA\x00':
+            raise Exception('Malformed DCX header')
+        self.uncompressedSize = values[7]
+        self.compressedSize = values[8]
+        self.level = values[12]
+        self.dataOffset = values[5]
+
+
+def peek(source, size):
+    """
+    The first `size` bytes of the bytes-like object or seekable stream `source`. Streams are read from their current
+    position and left there.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(memoryview(source)[0:size])
+    position = source.tell()
+    data = source.read(size)
+    source.seek(position)
+    return data
+
+
+def is_dcx(source):
+    """
+    Whether the bytes-like object or seekable stream `source` starts with the DCX magic. Streams are left at the
+    position they were at.
+    """
+    return peek(source, 4) == MAGIC
+
+
+def open_source(source, decompressor=None):
+    """
+    The contents of the bytes-like object or seekable stream `source`: `source` itself, or when it is a DCX
+    container its inflated contents, in the buffer of `decompressor` (a new one by default).
+    """
+    if is_dcx(source):
+        return (decompressor if decompressor is not None else DcxDecompressor()).decompress(source)
+    return source
+
+
+class DcxDecompressor:
+    """
+    Inflates DCX containers into a buffer kept from one file to the next, so a batch only allocates when a file
+    is larger than every previous one. Compressed input is consumed `chunkSize` bytes at a time, from memory or
+    straight from a stream, and never held whole.
+
+    The view returned by `decompress` is only valid until the next call: whatever reads from it (a `FlverModel`
+    and the zero-copy slices it hands out) must be done with it by then.
+    """
+    def __init__(self, chunkSize=1024 * 1024):
+        self.chunkSize = chunkSize
+        self.buffer = bytearray()
+        self.input = bytearray(chunkSize)
+
+    def reserve(self, size):
+        if len(self.buffer) < size:
+            # a new buffer rather than a resize, views of the previous one may still be alive
+            self.buffer = bytearray(size)
+        return self.buffer
+
+    def chunks(self, source, offset, size):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = memoryview(source)
+            for start in range(offset, offset + size, self.chunkSize):
+                yield data[start:min(start + self.chunkSize, offset + size)]
+            return
+        source.seek(offset)
+        view = memoryview(self.input)
+        remaining = size
+        while remaining > 0:
+            count = source.readinto(view[:min(self.chunkSize, remaining)])
+            if not count:
+                break
+            remaining -= count
+            yield view[:count]
+
+    def decompress(self, source):
+        """
+        Inflate the DCX container held by the bytes-like object or seekable binary stream `source`.
+
+        Returns:
+            memoryview: the uncompressed contents, a view of the reusable buffer.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            header = DcxHeader(memoryview(source)[0:DcxHeader.codec.size])
+            start = 0
+        else:
+            start = source.tell()
+            header = DcxHeader(source.read(DcxHeader.codec.size))
+
+        size = header.uncompressedSize
+        view = memoryview(self.reserve(size))
+        inflater = zlib.decompressobj()
+        offset = 0
+        for chunk in self.chunks(source, start + header.dataOffset, header.compressedSize):
+            while chunk and not inflater.eof:
+                data = inflater.decompress(chunk, self.chunkSize)
+                if offset + len(data) > size:
+                    raise Exception('DCX payload larger than its declared {} bytes'.format(size))
+                view[offset:offset + len(data)] = data
+                offset += len(data)
+                chunk = inflater.unconsumed_tail
+        data = inflater.flush()
+        if offset + len(data) > size:
+            raise Exception('DCX payload larger than its declared {} bytes'.format(size))
+        view[offset:offset + len(data)] = data
+        offset += len(data)
+        if not inflater.eof or offset != size:
+            raise Exception('Truncated DCX payload: expected {} bytes, got {}'.format(size, offset))
+        return view[:size]
+
+
+# inflated DCX files of a batch (one per worker process) all go through the same buffer
+batchDecompressor = DcxDecompressor()
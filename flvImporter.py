@@ -1,96 +1,273 @@
-from reader import BinaryReader, FlvReader
-
-f = open('customMade.flver', 'rb');
-br = None;
-identifier = f.read(6)
-endianness = f.read(2)
-
-if endianness == b'B\x00':
-    endianness = 'big'
-elif endianness == b'L\x00':
-    endianness = 'little'
-else:
-    raise Exception('Endianness unrecognized: expected either B or L, got {}'.format(endianness))
-
-br = FlvReader(f, endianness);
-version = br.assert_int32(0x2001A)
-
-dataOffset = br.read_int32();
-dataSize = br.read_int32();
-dummyCount = br.read_int32();
-materialCount = br.read_int32();
-boneCount = br.read_int32();
-meshCount = br.read_int32();
-vertexBufferCount = br.read_int32();
-
-boundingBoxMin = br.read_vector3()
-boundingBoxMax = br.read_vector3()
-
-Unk40 = br.read_int32();
-totalFaceCount = br.read_int32();
-
-Unk48 = br.assert_byte(0x00, 0x10);
-br.assert_bool(True);
-Unk4A = br.read_bool();
-br.assert_byte(0);
-
-br.assert_int16(0);
-Unk4E = br.assert_int16(0, -1);
-
-faceSetCount = br.read_int32();
-bufferLayoutCount = br.read_int32();
-textureCount = br.read_int32();
-
-Unk5C = br.read_int32();
-br.assert_int32(0);
-br.assert_int32(0);
-Unk68 = br.assert_int32(0, 1, 2, 3, 4);
-br.assert_int32(0);
-br.assert_int32(0);
-br.assert_int32(0);
-br.assert_int32(0);
-br.assert_int32(0);
-
-meshes = []
-faceSets = []
-faceSetsDict = {}
-vertexBuffers = []
-vertexBuffersDict = {}
-bufferLayouts = []
-textures = []
-for i in range(0, dummyCount):
-    br.read_dummy()
-
-for i in range(0, materialCount):
-    br.read_material()
-
-for i in range(0, boneCount):
-    br.read_bones()
-
-for i in range(0, meshCount):
-    meshes.append(br.read_meshes(version))
-
-for i in range(0, faceSetCount):
-    faceset = br.read_face_set(dataOffset)
-    faceSets.append(faceset)
-    faceSetsDict[i] = faceset
-
-for i in range(0, vertexBufferCount):
-    vertexBuffer = br.read_vertex_buffer()
-    vertexBuffers.append(vertexBuffer);
-    vertexBuffersDict[i] = vertexBuffer
-
-for i in range(0, bufferLayoutCount):
-    bufferLayouts.append(br.read_buffer_layout());
-
-for i in range(0, textureCount):
-    textures.append(br.read_texture())
-
-if version >= 0x2001A:
-    sekiroUnknown = br.read_sekiro_unk()
-for mesh in meshes:
-    mesh.take_face_sets(faceSetsDict)
-    mesh.take_vertex_buffers(vertexBuffersDict)
-    br.read_vertices(mesh, bufferLayouts, dataOffset, version)
-
-print('oo')
+import argparse
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bnd4 import Bnd4Archive, is_archive_name
+from cache import MeshCache, file_digest
+from dcx import batchDecompressor
+from manifest import ImportManifest
+from model import FlverModel, select_face_sets
+from optimize import optimize_meshes, triangulate_meshes
+from reader import AttributeFormat, Instrumentation, Validator
+from skin import INDEX_TYPES, WEIGHT_TYPES, build_skins
+
+
+class ImportResult:
+    def __init__(self, path):
+        self.path = path
+        self.size = 0
+        self.mtime = 0.0
+        self.digest = None
+        self.outputs = []
+        self.seconds = 0.0
+        self.error = None
+        self.meshCount = 0
+        self.vertexCount = 0
+        self.indexCount = 0
+        self.stages = {}
+        self.reports = []
+        self.issues = []
+        self.skins = []
+
+
+def find_inputs(patterns, extensions=('.flver', '.flver.dcx', 'bnd', 'bnd.dcx')):
+    """
+    Expand the command line inputs: files are taken as they are, directories are walked recursively for files
+    ending with one of `extensions` and anything else is treated as a (recursive) glob pattern.
+    """
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = []
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                matches.extend(os.path.join(root, name) for name in sorted(files)
+                               if name.lower().endswith(extensions))
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+        for path in matches:
+            if os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def import_file(path, cacheDirectory=None, cacheSize=None, threads=None, weldEpsilon=None, validation=None,
+                skin=None, precision=None, faceSets=None, triangulate=False, digest=False):
+    result = ImportResult(path)
+    start = time.perf_counter()
+    instrumentation = Instrumentation() if Instrumentation.default is not None else None
+    try:
+        stat = os.stat(path)
+        result.size = stat.st_size
+        result.mtime = stat.st_mtime
+        if digest:
+            result.digest = file_digest(path)
+        if is_archive_name(path):
+            with Bnd4Archive(path, batchDecompressor) as archive:
+                models = archive.load_models(workers=threads, instrumentation=instrumentation, validation=validation,
+                                             precision=precision, faceSets=faceSets)
+                meshes = [mesh for model in models for mesh in model.meshes]
+                result.issues = ['{}: {}'.format(model.path, issue) for model in models for issue in model.issues]
+                for model in models:
+                    model.close()
+        elif cacheDirectory is not None:
+            cache = MeshCache(cacheDirectory, cacheSize, precision)
+            if result.digest is None:
+                result.digest = file_digest(path)
+            key = cache.key(path, result.digest)
+            meshes = cache.load(path, key)
+            if faceSets is not None:
+                # the cached indices are memory-mapped, the dropped face sets are never paged in
+                select_face_sets(meshes, **faceSets)
+            result.outputs = [os.path.abspath(cache.entry_path(key))]
+        else:
+            with FlverModel(path, instrumentation, validation, batchDecompressor, precision) as model:
+                if faceSets is not None:
+                    model.select_face_sets(**faceSets)
+                meshes = model.load(threads).meshes
+                result.issues = [str(issue) for issue in model.issues]
+        if skin is not None:
+            # only the counts go back to the parent process, not the skin arrays
+            result.skins = [(skinData.vertexCount, skinData.indexType, skinData.weightType) if skinData else None
+                            for skinData in build_skins(meshes, **skin)]
+        if triangulate:
+            triangulate_meshes(meshes)
+        if weldEpsilon is not None:
+            result.reports = optimize_meshes(meshes, weldEpsilon)
+        result.meshCount = len(meshes)
+        for mesh in meshes:
+            result.vertexCount += mesh.vertexData.vertexCount
+            for faceSet in mesh.faceSets:
+                result.indexCount += len(faceSet.vertices)
+    except Exception:
+        result.error = traceback.format_exc()
+    result.seconds = time.perf_counter() - start
+    if instrumentation is not None:
+        result.stages = instrumentation.stages
+    return result
+
+
+def import_files(paths, jobs=None, cacheDirectory=None, cacheSize=None, threads=None, weldEpsilon=None,
+                 validation=None, skin=None, precision=None, faceSets=None, triangulate=False, digest=False):
+    """
+    Import every file of `paths`, yielding an `ImportResult` per file as soon as it is done; BND4 archives yield
+    one result for all the FLVERs they hold. Failures are reported in the result instead of stopping the run.
+    Decoded meshes of loose files are reused from and stored in the `MeshCache` at `cacheDirectory` when one is
+    given. With `weldEpsilon` the meshes also go through `optimize_meshes`. `validation` is the `Validator` mode
+    files are parsed with, `skin` the `build_skin` options global skin arrays are built with and `precision` the
+    vertex attribute precision per semantic, see `AttributeFormat`. Only the face sets matching the `faceSets`
+    criteria of `FlverModel.select_face_sets` are decoded, and with `triangulate` the triangle strips are
+    converted to triangle lists (before the optimization, which then reorders them too). Files are only hashed
+    (into `ImportResult.digest`) with `digest` or to look them up in the cache.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield import_file(path, cacheDirectory, cacheSize, threads, weldEpsilon, validation, skin, precision,
+                              faceSets, triangulate, digest)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        futures = [executor.submit(import_file, path, cacheDirectory, cacheSize, threads, weldEpsilon, validation,
+                                   skin, precision, faceSets, triangulate, digest) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def import_pass(paths, args, manifest=None, retryFailed=True):
+    """
+    Import `paths` with the command line options, or with a `manifest` only the changed ones (and the failed
+    ones with `retryFailed`), after pruning the recorded inputs deleted since and their outputs.
+    """
+    unchanged = 0
+    if manifest is not None:
+        for path in manifest.prune():
+            print('Pruned {}'.format(path))
+        changed = manifest.changed(paths, retryFailed)
+        unchanged = len(paths) - len(changed)
+        paths = changed
+        if not paths:
+            manifest.save()
+            if args.watch is None:
+                print('{} files unchanged'.format(unchanged))
+            return 0
+
+    start = time.perf_counter()
+    totalSize = 0
+    failures = []
+    weldEpsilon = args.weld_epsilon if args.optimize else None
+    skin = None
+    if args.skin:
+        skin = {'threshold': args.skin_threshold, 'indexType': args.skin_indices, 'weightType': args.skin_weights}
+    faceSets = None
+    if args.lod is not None or args.no_motion_blur or args.face_set_mask:
+        faceSets = {'lods': args.lod, 'motionBlur': False if args.no_motion_blur else None,
+                    'mask': args.face_set_mask, 'flags': args.face_set_flags & args.face_set_mask}
+    for result in import_files(paths, args.jobs, args.cache, args.cache_size * 1024 * 1024, args.threads, weldEpsilon,
+                               args.validate, skin, args.precision, faceSets, args.triangulate, manifest is not None):
+        totalSize += result.size
+        if manifest is not None and result.digest is not None:
+            manifest.record(result)
+        if Instrumentation.default is not None:
+            Instrumentation.default.merge(result.stages)
+        for issue in result.issues:
+            print('WARNING {}: {}'.format(result.path, issue), file=sys.stderr)
+        if result.error is not None:
+            failures.append(result)
+            print('FAILED {} ({:.1f} ms)\n{}'.format(result.path, result.seconds * 1000, result.error), file=sys.stderr)
+        elif not args.quiet:
+            print('{} {:.1f} ms, {} meshes, {} vertices, {} indices'.format(
+                result.path, result.seconds * 1000, result.meshCount, result.vertexCount, result.indexCount))
+            for index, skinData in enumerate(result.skins):
+                if skinData is not None:
+                    print('  mesh {}: {} skinned vertices, {} indices, {} weights'.format(index, *skinData))
+            for index, report in enumerate(result.reports):
+                print('  mesh {}: {} -> {} vertices, ACMR {:.3f} -> {:.3f}'.format(
+                    index, report.vertexCountBefore, report.vertexCountAfter, report.acmrBefore, report.acmrAfter))
+    elapsed = time.perf_counter() - start
+    if manifest is not None:
+        manifest.save()
+
+    print('{} files ({} failed{}) in {:.2f} s: {:.1f} files/s, {:.1f} MB/s'.format(
+        len(paths), len(failures), ', {} unchanged'.format(unchanged) if manifest is not None else '', elapsed,
+        len(paths) / elapsed, totalSize / elapsed / (1024 * 1024)))
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Import FLVER models.',
+        epilog='NumPy is an optional dependency (pip install numpy). When it is installed, vertex buffers, skins and '
+               'bind-pose matrices are decoded in batches outside of the GIL, which also lets --threads overlap; '
+               'without it the standard library fallbacks give the same results, more slowly.')
+    parser.add_argument('inputs', nargs='+', help='.flver files, directories or glob patterns')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (defaults to the number of cores)')
+    parser.add_argument('-t', '--threads', type=int, default=None, help='threads decoding the buffers of each file')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only print failures and the summary')
+    parser.add_argument('--cache', metavar='DIRECTORY', help='reuse decoded meshes cached in this directory')
+    parser.add_argument('--cache-size', type=int, default=1024, metavar='MB', help='maximum size of the cache (default: 1024 MB)')
+    parser.add_argument('--optimize', action='store_true', help='weld vertices and reorder triangles for the vertex cache')
+    parser.add_argument('--weld-epsilon', type=float, default=0.0, metavar='EPSILON',
+                        help='grid size float attributes are snapped to when welding (default: bit-identical only)')
+    parser.add_argument('--validate', choices=Validator.modes, default=None,
+                        help='stop at the first malformed field (strict), report them all (collect) or skip the checks (off)')
+    parser.add_argument('--skin', action='store_true', help='build normalized skin arrays with global bone indices')
+    parser.add_argument('--skin-threshold', type=float, default=0.0, metavar='WEIGHT', help='prune weights below this')
+    parser.add_argument('--skin-indices', choices=sorted(INDEX_TYPES), default=None,
+                        help='bone index type (default: the smallest one fitting)')
+    parser.add_argument('--skin-weights', choices=WEIGHT_TYPES, default='float32', help='bone weight type')
+    parser.add_argument('--precision', action='append', default=[], metavar='[SEMANTIC=]PRECISION',
+                        help='store vertex attributes as {} (default: float32), for every semantic or one of {}'.format(
+                            ', '.join(AttributeFormat.precisions), ', '.join(AttributeFormat.semantics)))
+    parser.add_argument('--lod', type=int, action='append', choices=(0, 1, 2), default=None, metavar='LEVEL',
+                        help='only decode the face sets of this level of detail, 0 being the full detail (repeatable)')
+    parser.add_argument('--no-motion-blur', action='store_true', help='skip the motion blur face sets')
+    parser.add_argument('--face-set-mask', type=lambda value: int(value, 0), default=0, metavar='MASK',
+                        help='only decode the face sets whose flags masked with MASK equal --face-set-flags')
+    parser.add_argument('--face-set-flags', type=lambda value: int(value, 0), default=0, metavar='FLAGS')
+    parser.add_argument('--triangulate', action='store_true', help='convert triangle strips to triangle lists')
+    parser.add_argument('--manifest', metavar='FILE', help='only import the inputs that changed since the run recorded here')
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                        help='with --manifest, look for changed inputs again every SECONDS until interrupted')
+    args = parser.parse_args(argv)
+    if args.watch is not None and args.manifest is None:
+        parser.error('--watch requires --manifest')
+    precision = {}
+    try:
+        for option in args.precision:
+            semantic, _, value = option.rpartition('=')
+            precision.update({semantic: value} if semantic else AttributeFormat.normalize(value))
+        args.precision = AttributeFormat.normalize(precision)
+    except Exception as error:
+        parser.error(str(error))
+
+    manifest = ImportManifest(args.manifest) if args.manifest is not None else None
+    status = 0
+    retryFailed = True
+    try:
+        while True:
+            paths = find_inputs(args.inputs)
+            if not paths and args.watch is None:
+                print('No input files found', file=sys.stderr)
+                return 1
+            status = import_pass(paths, args, manifest, retryFailed)
+            if args.watch is None:
+                return status
+            # failures are only retried once their file changes while watching
+            retryFailed = False
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
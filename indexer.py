@@ -0,0 +1,295 @@
+import argparse
+import io
+import os
+import sqlite3
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dcx import batchDecompressor, open_source, peek
+from flvImporter import find_inputs
+from reader import FlvReader, read_endianness
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    error TEXT,
+    endianness TEXT,
+    version INTEGER,
+    dummyCount INTEGER,
+    materialCount INTEGER,
+    boneCount INTEGER,
+    meshCount INTEGER,
+    faceSetCount INTEGER,
+    vertexBufferCount INTEGER,
+    textureCount INTEGER,
+    totalFaceCount INTEGER
+);
+CREATE TABLE IF NOT EXISTS materials (
+    fileId INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    materialIndex INTEGER NOT NULL,
+    name TEXT,
+    mtd TEXT
+);
+CREATE TABLE IF NOT EXISTS textures (
+    fileId INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    materialIndex INTEGER NOT NULL,
+    path TEXT,
+    type TEXT
+);
+CREATE TABLE IF NOT EXISTS bones (
+    fileId INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    boneIndex INTEGER NOT NULL,
+    name TEXT,
+    parentIndex INTEGER
+);
+CREATE TABLE IF NOT EXISTS meshes (
+    fileId INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    meshIndex INTEGER NOT NULL,
+    materialIndex INTEGER,
+    dynamic INTEGER,
+    boneCount INTEGER,
+    faceSetCount INTEGER,
+    vertexBufferCount INTEGER,
+    minX REAL, minY REAL, minZ REAL,
+    maxX REAL, maxY REAL, maxZ REAL
+);
+CREATE INDEX IF NOT EXISTS materialsByMtd ON materials(mtd);
+CREATE INDEX IF NOT EXISTS materialsByFile ON materials(fileId);
+CREATE INDEX IF NOT EXISTS texturesByPath ON textures(path);
+CREATE INDEX IF NOT EXISTS texturesByFile ON textures(fileId);
+CREATE INDEX IF NOT EXISTS bonesByName ON bones(name);
+CREATE INDEX IF NOT EXISTS bonesByFile ON bones(fileId);
+CREATE INDEX IF NOT EXISTS meshesByFile ON meshes(fileId);
+'''
+
+HEADER_COLUMNS = ('version', 'dummyCount', 'materialCount', 'boneCount', 'meshCount', 'faceSetCount',
+                  'vertexBufferCount', 'textureCount', 'totalFaceCount')
+
+
+class IndexEntry:
+    def __init__(self, path):
+        self.path = path
+        self.size = 0
+        self.mtime = 0.0
+        self.error = None
+        self.endianness = None
+        self.header = None
+        self.materials = []
+        self.textures = []
+        self.bones = []
+        self.meshes = []
+
+
+def read_metadata(path):
+    """
+    Read the header and the material, bone, mesh and texture tables of the FLVER at `path`. The dummy, face set,
+    vertex buffer and layout tables are skipped over and no index or vertex data is touched. DCX files are
+    inflated in memory first.
+    """
+    entry = IndexEntry(path)
+    try:
+        stat = os.stat(path)
+        entry.size = stat.st_size
+        entry.mtime = stat.st_mtime
+        with open(path, 'rb') as stream:
+            source = open_source(stream, batchDecompressor)
+            entry.endianness = read_endianness(io.BytesIO(peek(source, 8)))
+            br = FlvReader(source, entry.endianness)
+            try:
+                br.seek(8)
+                records = br.records
+                header = br.read_header()
+                entry.header = tuple(getattr(header, name) for name in HEADER_COLUMNS)
+                br.skip(records.dummy.codec.size * header.dummyCount)
+                materials = br.read_materials(header.materialCount)
+                bones = br.read_bone_table(header.boneCount)
+                meshes = br.read_mesh_table(header.meshCount, header.version)
+                br.skip(records.faceSet.codec.size * header.faceSetCount
+                        + records.vertexBuffer.codec.size * header.vertexBufferCount
+                        + records.bufferLayout.codec.size * header.bufferLayoutCount)
+                textures = br.read_textures(header.textureCount)
+            finally:
+                br.close()
+    except Exception:
+        entry.error = traceback.format_exc()
+        return entry
+
+    for index, material in enumerate(materials):
+        entry.materials.append((index, material.name, material.mtd))
+        for texture in textures[material.textureIndex:material.textureIndex + material.textureCount]:
+            entry.textures.append((index, texture.path, texture.type))
+    entry.bones = [(index, bone.name, bone.parentIndex) for index, bone in enumerate(bones)]
+    for index, mesh in enumerate(meshes):
+        box = (None,) * 6
+        if header.version >= 0x20013:
+            box = (mesh.boundingBoxMin.x, mesh.boundingBoxMin.y, mesh.boundingBoxMin.z,
+                   mesh.boundingBoxMax.x, mesh.boundingBoxMax.y, mesh.boundingBoxMax.z)
+        entry.meshes.append((index, mesh.materialIndex, mesh.dynamic, mesh.boneCount, mesh.faceSetCount,
+                             mesh.vertexBufferCount) + box)
+    return entry
+
+
+class MetadataIndex:
+    """
+    SQLite database of the header and table metadata of a FLVER library. `update` only re-reads the files whose
+    size or modification time changed since they were indexed.
+    """
+    def __init__(self, databasePath):
+        self.connection = sqlite3.connect(databasePath)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def stale_paths(self, paths):
+        """
+        The paths of `paths` which are not indexed yet or whose size or modification time changed.
+        """
+        known = {path: (size, mtime) for path, size, mtime in self.connection.execute('SELECT path, size, mtime FROM files')}
+        stale = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (stat.st_size, stat.st_mtime):
+                stale.append(path)
+        return stale
+
+    def store(self, entry):
+        with self.connection:
+            self.connection.execute('DELETE FROM files WHERE path = ?', (entry.path,))
+            header = entry.header if entry.header is not None else (None,) * len(HEADER_COLUMNS)
+            fileId = self.connection.execute(
+                'INSERT INTO files (path, size, mtime, error, endianness, {}) VALUES (?, ?, ?, ?, ?, {})'.format(
+                    ', '.join(HEADER_COLUMNS), ', '.join('?' * len(HEADER_COLUMNS))),
+                (entry.path, entry.size, entry.mtime, entry.error, entry.endianness) + header).lastrowid
+            self.connection.executemany('INSERT INTO materials VALUES (?, ?, ?, ?)',
+                                        [(fileId,) + values for values in entry.materials])
+            self.connection.executemany('INSERT INTO textures VALUES (?, ?, ?, ?)',
+                                        [(fileId,) + values for values in entry.textures])
+            self.connection.executemany('INSERT INTO bones VALUES (?, ?, ?, ?)',
+                                        [(fileId,) + values for values in entry.bones])
+            self.connection.executemany('INSERT INTO meshes VALUES ({})'.format(', '.join('?' * 13)),
+                                        [(fileId,) + values for values in entry.meshes])
+
+    def prune(self, paths):
+        """
+        Forget the indexed files that are not part of `paths` anymore, returning how many were removed.
+        """
+        paths = set(paths)
+        removed = [(path,) for path, in self.connection.execute('SELECT path FROM files') if path not in paths]
+        with self.connection:
+            self.connection.executemany('DELETE FROM files WHERE path = ?', removed)
+        return len(removed)
+
+    def update(self, paths, jobs=None, prune=False):
+        """
+        Index the new and modified files of `paths`, yielding an `IndexEntry` per file read. With `prune`, the
+        files missing from `paths` are removed from the index.
+        """
+        if prune:
+            self.prune(paths)
+        stale = self.stale_paths(paths)
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        if jobs <= 1 or len(stale) <= 1:
+            entries = map(read_metadata, stale)
+            for entry in entries:
+                self.store(entry)
+                yield entry
+            return
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as executor:
+            futures = [executor.submit(read_metadata, path) for path in stale]
+            for future in as_completed(futures):
+                entry = future.result()
+                self.store(entry)
+                yield entry
+
+    def query(self, mtd=None, texture=None, material=None, bone=None, minBones=None, maxBones=None, version=None):
+        """
+        Paths of the indexed files matching every given criterion. `mtd`, `texture`, `material` and `bone` match
+        case-insensitive substrings of the MTD paths, texture paths, material names and bone names.
+        """
+        conditions = ['error IS NULL']
+        parameters = []
+        for value, table, column in ((mtd, 'materials', 'mtd'), (texture, 'textures', 'path'),
+                                     (material, 'materials', 'name'), (bone, 'bones', 'name')):
+            if value is not None:
+                conditions.append('id IN (SELECT fileId FROM {} WHERE instr(lower({}), lower(?)) > 0)'.format(table, column))
+                parameters.append(value)
+        if minBones is not None:
+            conditions.append('boneCount >= ?')
+            parameters.append(minBones)
+        if maxBones is not None:
+            conditions.append('boneCount <= ?')
+            parameters.append(maxBones)
+        if version is not None:
+            conditions.append('version = ?')
+            parameters.append(version)
+        sql = 'SELECT path FROM files WHERE {} ORDER BY path'.format(' AND '.join(conditions))
+        return [path for path, in self.connection.execute(sql, parameters)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Index and query the metadata of a FLVER library.')
+    parser.add_argument('--database', default='flver_index.sqlite', help='index database (default: flver_index.sqlite)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    update = commands.add_parser('update', help='index new and modified files')
+    update.add_argument('inputs', nargs='+', help='.flver files, directories or glob patterns')
+    update.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (defaults to the number of cores)')
+    update.add_argument('--prune', action='store_true', help='forget indexed files that are not among the inputs anymore')
+
+    query = commands.add_parser('query', help='list the indexed files matching every given criterion')
+    query.add_argument('--mtd', help='MTD path substring')
+    query.add_argument('--texture', help='texture path substring')
+    query.add_argument('--material', help='material name substring')
+    query.add_argument('--bone', help='bone name substring')
+    query.add_argument('--min-bones', type=int, help='minimum bone count')
+    query.add_argument('--max-bones', type=int, help='maximum bone count')
+    query.add_argument('--version', type=lambda value: int(value, 0), help='FLVER version, e.g. 0x2001A')
+    query.add_argument('--sql', help='run this SQL statement instead and print its rows')
+    args = parser.parse_args(argv)
+
+    with MetadataIndex(args.database) as index:
+        if args.command == 'update':
+            # archives are not indexed, only bare (or DCX compressed) FLVERs
+            paths = [os.path.abspath(path) for path in find_inputs(args.inputs, ('.flver', '.flver.dcx'))]
+            start = time.perf_counter()
+            count = 0
+            failures = 0
+            for entry in index.update(paths, args.jobs, args.prune):
+                count += 1
+                if entry.error is not None:
+                    failures += 1
+                    print('FAILED {}\n{}'.format(entry.path, entry.error), file=sys.stderr)
+            print('{} files, {} indexed ({} failed) in {:.2f} s'.format(
+                len(paths), count, failures, time.perf_counter() - start))
+            return 1 if failures else 0
+
+        if args.sql is not None:
+            for row in index.connection.execute(args.sql):
+                print('\t'.join(str(value) for value in row))
+            return 0
+        for path in index.query(args.mtd, args.texture, args.material, args.bone, args.min_bones, args.max_bones,
+                                args.version):
+            print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
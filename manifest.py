@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+
+from cache import file_digest
+from reader import READER_VERSION
+
+
+class ImportManifest:
+    """
+    Record of a previous batch import: the size, modification time and content hash of every input, with the
+    outputs (cache entries) produced for it or whether importing it failed. `changed` tells which inputs must be
+    imported again; files whose modification time moved but whose contents did not are only re-hashed. Outputs
+    left behind by changed or deleted inputs are removed unless another input shares them. Everything is stale once
+    the reader version changes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path) as stream:
+                data = json.load(stream)
+            if data.get('readerVersion') == READER_VERSION:
+                self.files = data['files']
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporaryPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as stream:
+                json.dump({'readerVersion': READER_VERSION, 'files': self.files}, stream, indent=1, sort_keys=True)
+            os.replace(temporaryPath, self.path)
+        except BaseException:
+            os.unlink(temporaryPath)
+            raise
+
+    def changed(self, paths, retryFailed=True):
+        """
+        The paths of `paths` that are new, whose contents changed since they were recorded or some of whose outputs
+        were deleted since (e.g. evicted from the cache), and those which failed to import when `retryFailed` is set.
+        """
+        changed = []
+        for path in paths:
+            entry = self.files.get(os.path.abspath(path))
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if entry is None or entry['size'] != stat.st_size or (retryFailed and entry['failed']):
+                changed.append(path)
+            elif not all(os.path.exists(output) for output in entry['outputs']):
+                changed.append(path)
+            elif entry['mtime'] != stat.st_mtime:
+                if file_digest(path) == entry['hash']:
+                    entry['mtime'] = stat.st_mtime
+                else:
+                    changed.append(path)
+        return changed
+
+    def record(self, result):
+        """
+        Store the `ImportResult` of an input.
+        """
+        previous = self.files.get(os.path.abspath(result.path))
+        self.files[os.path.abspath(result.path)] = {
+            'size': result.size,
+            'mtime': result.mtime,
+            'hash': result.digest,
+            'failed': result.error is not None,
+            'outputs': result.outputs,
+            'meshCount': result.meshCount,
+            'vertexCount': result.vertexCount,
+            'indexCount': result.indexCount,
+        }
+        if previous is not None:
+            self.release(previous['outputs'])
+
+    def prune(self):
+        """
+        Forget the recorded inputs which no longer exist and delete the outputs no remaining input shares. Inputs
+        merely left out of a run are kept.
+
+        Returns:
+            list: the forgotten inputs.
+        """
+        removed = [path for path in self.files if not os.path.exists(path)]
+        outputs = []
+        for path in removed:
+            outputs += self.files.pop(path)['outputs']
+        self.release(outputs)
+        return removed
+
+    def release(self, outputs):
+        """
+        Delete the files of `outputs` no recorded input refers to anymore.
+        """
+        outputs = set(outputs)
+        for entry in self.files.values():
+            outputs.difference_update(entry['outputs'])
+        for output in outputs:
+            try:
+                os.unlink(output)
+            except FileNotFoundError:
+                pass
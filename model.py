@@ -0,0 +1,227 @@
+import fnmatch
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dcx import open_source, peek
+from reader import AttributeFormat, FlvReader, Validator, read_endianness
+from skeleton import Skeleton
+
+
+class FlverModel:
+    """
+    A FLVER file whose header and tables are parsed when it is opened. The face set indices and vertex data of
+    each mesh are only decoded the first time they are accessed, then kept on the mesh. `validation` is the
+    `Validator` mode to parse with; in 'collect' mode the discrepancies found end up in `issues`.
+
+    DCX compressed sources are inflated in memory, into the buffer of `decompressor` when one is given so that a
+    batch can reuse it. Vertex attributes are decoded in the `precision` given per semantic, see
+    `AttributeFormat`.
+    """
+    def __init__(self, source, instrumentation=None, validation=None, decompressor=None, precision=None):
+        self.stream = None
+        self._skeleton = None
+        self.precision = AttributeFormat.normalize(precision)
+        if isinstance(source, (str, os.PathLike)):
+            self.path = source
+            self.stream = source = open(source, 'rb')
+        else:
+            self.path = getattr(source, 'name', None)
+
+        try:
+            source = open_source(source, decompressor)
+            self.reader = FlvReader(source, read_endianness(io.BytesIO(peek(source, 8))))
+            if instrumentation is not None:
+                self.reader.instrumentation = instrumentation
+            if validation is not None:
+                self.reader.validator = Validator(validation)
+            self.reader.seek(8)
+            self.read_tables()
+        except Exception:
+            if self.stream is not None:
+                self.stream.close()
+            raise
+
+    def read_tables(self):
+        br = self.reader
+        self.header = header = br.read_header()
+        self.version = header.version
+        self.dataOffset = header.dataOffset
+
+        self.dummies = br.read_dummies(header.dummyCount)
+        self.materials = br.read_materials(header.materialCount)
+        self.bones = br.read_bone_table(header.boneCount)
+        self.meshes = br.read_mesh_table(header.meshCount, self.version)
+        self.faceSets = br.read_face_sets(header.faceSetCount, self.dataOffset, readIndices=False)
+        self.vertexBuffers = br.read_vertex_buffers(header.vertexBufferCount)
+        self.bufferLayouts = br.read_buffer_layouts(header.bufferLayoutCount)
+        self.textures = br.read_textures(header.textureCount)
+
+        if self.version >= 0x2001A:
+            br.read_sekiro_unk()
+
+        faceSetsDict = dict(enumerate(self.faceSets))
+        vertexBuffersDict = dict(enumerate(self.vertexBuffers))
+        for faceSet in self.faceSets:
+            faceSet.loader = self
+        for mesh in self.meshes:
+            mesh.take_face_sets(faceSetsDict)
+            mesh.take_vertex_buffers(vertexBuffersDict)
+            mesh.material = self.materials[mesh.materialIndex]
+            mesh.loader = self
+
+    @property
+    def skeleton(self):
+        """
+        Array-backed `Skeleton` of the bone table, built on first access.
+        """
+        if self._skeleton is None:
+            self._skeleton = Skeleton.from_bones(self.bones)
+        return self._skeleton
+
+    @property
+    def issues(self):
+        return self.reader.validator.issues
+
+    def load_indices(self, faceSet):
+        return self.reader.read_face_set_indices(faceSet, self.dataOffset)
+
+    def load_vertices(self, mesh):
+        return self.reader.read_vertices(mesh, self.bufferLayouts, self.dataOffset, self.version, self.precision)
+
+    def select(self, materials=None, region=None, indices=None):
+        """
+        Meshes matching every given criterion, resolved from the tables alone so nothing is decoded.
+
+        Args:
+            materials: material name or `fnmatch` pattern, or a list of them, the mesh material must match.
+            region: ((minX, minY, minZ), (maxX, maxY, maxZ)) box the mesh bounding box must intersect. Meshes of
+                versions before 0x20013 have no bounding box and are always kept.
+            indices: indices of the meshes to keep.
+
+        Returns:
+            list: the matching meshes, in file order.
+        """
+        if isinstance(materials, str):
+            materials = [materials]
+        if indices is not None:
+            indices = set(indices)
+        meshes = []
+        for index, mesh in enumerate(self.meshes):
+            if indices is not None and index not in indices:
+                continue
+            if materials is not None and not any(fnmatch.fnmatchcase(mesh.material.name, pattern)
+                                                 for pattern in materials):
+                continue
+            if region is not None and self.version >= 0x20013:
+                (minX, minY, minZ), (maxX, maxY, maxZ) = region
+                low, high = mesh.boundingBoxMin, mesh.boundingBoxMax
+                if low.x > maxX or low.y > maxY or low.z > maxZ or high.x < minX or high.y < minY or high.z < minZ:
+                    continue
+            meshes.append(mesh)
+        return meshes
+
+    def select_face_sets(self, lods=None, motionBlur=None, mask=0, flags=0, meshes=None):
+        """
+        Keep on every mesh, or only on `meshes`, the face sets matching `FaceSet.matches`, before anything is
+        decoded so that the indices of the other face sets are never read. Previews usually want `lods=(0,)` and
+        `motionBlur=False`.
+
+        Returns:
+            int: the number of face sets dropped.
+        """
+        return select_face_sets(self.meshes if meshes is None else meshes, lods, motionBlur, mask, flags)
+
+    def load(self, workers=None, meshes=None):
+        """
+        Decode the payloads of every mesh, or only of `meshes`, now instead of on first access. With `workers`, the
+        vertex and index buffers are decoded by a pool of that many threads sharing the read-only file buffer; the
+        results are the same as serial decoding. The threads only overlap when NumPy is installed, as the struct
+        fallback of `VertexDecoder` holds the GIL.
+        """
+        if meshes is None:
+            meshes = self.meshes
+        if workers is not None and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                vertexData = [(mesh, executor.submit(self.load_vertices, mesh))
+                              for mesh in meshes if mesh._vertexData is None]
+                indices = [(faceSet, executor.submit(self.load_indices, faceSet))
+                           for mesh in meshes for faceSet in mesh.faceSets if faceSet._vertices is None]
+                for mesh, future in vertexData:
+                    mesh.vertexData = future.result()
+                for faceSet, future in indices:
+                    faceSet.vertices = future.result()
+            return self
+
+        for mesh in meshes:
+            mesh.vertexData
+            for faceSet in mesh.faceSets:
+                faceSet.vertices
+        return self
+
+    def iter_meshes(self, meshes=None):
+        """
+        Yield the meshes, or only `meshes`, one at a time with their face sets and vertex data decoded. The payloads
+        of a mesh are released as soon as the consumer asks for the next one (unless they were already loaded
+        before), so memory stays proportional to the largest mesh rather than to the whole file.
+        """
+        for mesh in self.meshes if meshes is None else meshes:
+            unload = mesh._vertexData is None
+            unloadFaceSets = [faceSet for faceSet in mesh.faceSets if faceSet._vertices is None]
+            mesh.vertexData
+            for faceSet in mesh.faceSets:
+                faceSet.vertices
+            try:
+                yield mesh
+            finally:
+                if unload:
+                    mesh.vertexData = None
+                for faceSet in unloadFaceSets:
+                    faceSet.vertices = None
+
+    def close(self):
+        self.reader.close()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def select_face_sets(meshes, lods=None, motionBlur=None, mask=0, flags=0):
+    """
+    Drop the face sets of `meshes` not matching `FaceSet.matches`, see `FlverModel.select_face_sets`.
+    """
+    dropped = 0
+    for mesh in meshes:
+        faceSets = [faceSet for faceSet in mesh.faceSets if faceSet.matches(lods, motionBlur, mask, flags)]
+        dropped += len(mesh.faceSets) - len(faceSets)
+        mesh.faceSets = faceSets
+    return dropped
+
+
+def iter_meshes(source):
+    """
+    Open the FLVER at `source` and stream its decoded meshes, see `FlverModel.iter_meshes`.
+    """
+    with FlverModel(source) as model:
+        yield from model.iter_meshes()
+
+
+def load_meshes(source, materials=None, region=None, indices=None, workers=None, precision=None):
+    """
+    Open the FLVER at `source` and decode only the meshes matching the `FlverModel.select` criteria, so the I/O
+    and decoding scale with the selection rather than with the file.
+    """
+    with FlverModel(source, precision=precision) as model:
+        meshes = model.select(materials, region, indices)
+        model.load(workers, meshes)
+    for mesh in meshes:
+        mesh.loader = None
+        for faceSet in mesh.faceSets:
+            faceSet.loader = None
+    return meshes
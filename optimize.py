@@ -0,0 +1,308 @@
+from array import array
+
+from reader import VertexData
+
+CACHE_DECAY_POWER = 1.5
+LAST_TRIANGLE_SCORE = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+
+
+class MeshReport:
+    def __init__(self):
+        self.vertexCountBefore = 0
+        self.vertexCountAfter = 0
+        self.acmrBefore = 0.0
+        self.acmrAfter = 0.0
+
+
+def vertex_attributes(vertexData):
+    """
+    (name, values, components) of every attribute array of `vertexData`, list attributes named with their channel.
+    """
+    attributes = []
+    for name, components in (('positions', 3), ('normals', 4), ('boneWeights', 4), ('boneIndices', 4)):
+        values = getattr(vertexData, name)
+        if values is not None:
+            attributes.append((name, values, components))
+    for name, components in (('uvs', 3), ('tangents', 4), ('colors', 4)):
+        for channel, values in enumerate(getattr(vertexData, name)):
+            attributes.append(((name, channel), values, components))
+    return attributes
+
+
+def vertex_keys(vertexData, epsilon=0.0):
+    """
+    One hashable key per vertex, equal for vertices that should be welded: the raw bytes of all attributes, or
+    with `epsilon` the float attributes snapped to a grid of that size.
+    """
+    vertexCount = vertexData.vertexCount
+    columns = []
+    for name, values, components in vertex_attributes(vertexData):
+        values = memoryview(values)
+        if epsilon > 0 and values.format in ('f', 'd'):
+            scale = 1.0 / epsilon
+            snapped = [round(value * scale) for value in values]
+            columns.append([tuple(snapped[i:i + components]) for i in range(0, vertexCount * components, components)])
+        else:
+            stride = values.itemsize * components
+            raw = values.cast('B')
+            columns.append([raw[i:i + stride].tobytes() for i in range(0, vertexCount * stride, stride)])
+    if not columns:
+        return list(range(vertexCount))
+    return list(zip(*columns))
+
+
+def weld_vertices(vertexData, epsilon=0.0):
+    """
+    Merge the duplicated vertices of `vertexData`, keeping the first occurrence of each.
+
+    Args:
+        vertexData: the `VertexData` to weld.
+        epsilon: 0 to only merge bit-identical vertices, otherwise the grid size float attributes are snapped to
+            before comparing them.
+
+    Returns:
+        The welded `VertexData` and an array mapping every old vertex index to its new one.
+    """
+    remap = array('I', bytes(4 * vertexData.vertexCount))
+    unique = {}
+    kept = []
+    for index, key in enumerate(vertex_keys(vertexData, epsilon)):
+        newIndex = unique.setdefault(key, len(kept))
+        if newIndex == len(kept):
+            kept.append(index)
+        remap[index] = newIndex
+
+    welded = VertexData(len(kept))
+    welded.formats = dict(vertexData.formats)
+    for name, values, components in vertex_attributes(vertexData):
+        result = array(memoryview(values).format)
+        for index in kept:
+            result.extend(values[index * components:(index + 1) * components])
+        if isinstance(name, tuple):
+            getattr(welded, name[0]).append(result)
+        else:
+            setattr(welded, name, result)
+    return welded, remap
+
+
+def remap_indices(indices, remap):
+    """
+    Index array of the same type as `indices` with every index passed through `remap`. Indices outside of `remap`
+    (strip restart markers) are kept as they are.
+    """
+    count = len(remap)
+    return array(memoryview(indices).format, [remap[index] if index < count else index for index in indices])
+
+
+def strip_to_list(indices, restart=None):
+    """
+    Triangle list of the triangle strip `indices`, built with slice assignments over the whole index array rather
+    than index by index: the three corners of every triangle are strided copies of shifted slices, and every other
+    triangle has its first and last corners swapped back to the strip winding. The parity starts over after each
+    `restart` marker (0xFFFF or 0xFFFFFFFF by default, depending on the index size). Degenerate triangles, which
+    join strips, and the ones touching a restart marker are dropped.
+
+    Returns:
+        array: the triangle list, of the same type as `indices`.
+    """
+    typecode = memoryview(indices).format
+    if not isinstance(indices, array):
+        indices = array(typecode, indices)
+    if restart is None:
+        restart = 0xFFFF if indices.itemsize == 2 else 0xFFFFFFFF
+    result = array(typecode)
+    start = 0
+    while start < len(indices):
+        try:
+            stop = indices.index(restart, start)
+        except ValueError:
+            stop = len(indices)
+        count = stop - start - 2
+        if count > 0:
+            first, second, third = indices[start:stop - 2], indices[start + 1:stop - 1], indices[start + 2:stop]
+            triangles = array(typecode, bytes(3 * count * indices.itemsize))
+            triangles[0::3] = first
+            triangles[1::3] = second
+            triangles[2::3] = third
+            triangles[3::6] = third[1::2]
+            triangles[5::6] = first[1::2]
+            degenerate = [triangle for triangle, (a, b, c) in enumerate(zip(first, second, third))
+                          if a == b or b == c or a == c]
+            kept = 0
+            for triangle in degenerate:
+                result.extend(triangles[kept * 3:triangle * 3])
+                kept = triangle + 1
+            result.extend(triangles[kept * 3:])
+        start = stop + 1
+    return result
+
+
+def triangulate_meshes(meshes):
+    """
+    Replace the triangle strip face sets of `meshes` by the triangle lists `strip_to_list` makes of them.
+    """
+    for mesh in meshes:
+        for faceSet in mesh.faceSets:
+            if faceSet.triangleStrip:
+                faceSet.vertices = strip_to_list(faceSet.vertices)
+                faceSet.vertexCount = len(faceSet.vertices)
+                faceSet.triangleStrip = False
+
+
+def acmr(indices, cacheSize=32):
+    """
+    Average cache miss ratio of the triangle list `indices`: vertex transforms per triangle with a FIFO
+    post-transform cache of `cacheSize` entries. 3 is the worst case, about 0.5 is the best for regular meshes.
+    """
+    triangleCount = len(indices) // 3
+    if not triangleCount:
+        return 0.0
+    cached = set()
+    fifo = []
+    misses = 0
+    for index in indices[:triangleCount * 3]:
+        if index in cached:
+            continue
+        misses += 1
+        cached.add(index)
+        fifo.append(index)
+        if len(fifo) > cacheSize:
+            cached.discard(fifo.pop(0))
+    return misses / triangleCount
+
+
+def vertex_score(cachePosition, remainingTriangles, cacheSize):
+    if remainingTriangles == 0:
+        return -1.0
+    score = 0.0
+    if cachePosition >= 0:
+        if cachePosition < 3:
+            score = LAST_TRIANGLE_SCORE
+        else:
+            score = (1.0 - (cachePosition - 3) / (cacheSize - 3)) ** CACHE_DECAY_POWER
+    return score + VALENCE_BOOST_SCALE * remainingTriangles ** -VALENCE_BOOST_POWER
+
+
+def reorder_triangles(indices, cacheSize=32):
+    """
+    Reorder the triangles of the list `indices` for post-transform cache locality, following Tom Forsyth's
+    linear-speed vertex cache optimisation: every vertex is scored from its position in a simulated LRU cache and
+    the number of triangles still using it, and the best scored triangle touching the cache is emitted next.
+
+    Returns:
+        A new index array of the same type holding the same triangles.
+    """
+    triangleCount = len(indices) // 3
+    if triangleCount < 2:
+        return array(memoryview(indices).format, indices)
+    vertexCount = max(indices[:triangleCount * 3]) + 1
+
+    # Triangles of every vertex, packed into one array; `remaining` triangles of a vertex stay at the front
+    remaining = array('I', bytes(4 * vertexCount))
+    for index in indices[:triangleCount * 3]:
+        remaining[index] += 1
+    starts = array('I', bytes(4 * (vertexCount + 1)))
+    for vertex in range(vertexCount):
+        starts[vertex + 1] = starts[vertex] + remaining[vertex]
+    adjacency = array('I', bytes(4 * starts[vertexCount]))
+    filled = array('I', starts[:vertexCount])
+    for triangle in range(triangleCount):
+        for index in indices[triangle * 3:triangle * 3 + 3]:
+            adjacency[filled[index]] = triangle
+            filled[index] += 1
+
+    cachePositions = array('i', [-1]) * vertexCount
+    vertexScores = array('d', [vertex_score(-1, remaining[vertex], cacheSize) for vertex in range(vertexCount)])
+    triangleScores = array('d', [vertexScores[indices[t * 3]] + vertexScores[indices[t * 3 + 1]] +
+                                 vertexScores[indices[t * 3 + 2]] for t in range(triangleCount)])
+    emitted = bytearray(triangleCount)
+    result = array(memoryview(indices).format)
+    cache = []
+    bestTriangle = max(range(triangleCount), key=triangleScores.__getitem__)
+    cursor = 0
+
+    for i in range(triangleCount):
+        if bestTriangle < 0:
+            while emitted[cursor]:
+                cursor += 1
+            bestTriangle = cursor
+        emitted[bestTriangle] = 1
+        corners = indices[bestTriangle * 3:bestTriangle * 3 + 3]
+        result.extend(corners)
+
+        for vertex in corners:
+            start = starts[vertex]
+            end = start + remaining[vertex]
+            for slot in range(start, end):
+                if adjacency[slot] == bestTriangle:
+                    adjacency[slot] = adjacency[end - 1]
+                    adjacency[end - 1] = bestTriangle
+                    break
+            remaining[vertex] -= 1
+
+        newCache = list(dict.fromkeys(corners))
+        newCache += [vertex for vertex in cache if vertex not in newCache]
+        for vertex in newCache[cacheSize:]:
+            cachePositions[vertex] = -1
+        cache = newCache[:cacheSize]
+
+        bestTriangle = -1
+        bestScore = -1.0
+        for position, vertex in enumerate(newCache):
+            if position < cacheSize:
+                cachePositions[vertex] = position
+            score = vertex_score(cachePositions[vertex], remaining[vertex], cacheSize)
+            delta = score - vertexScores[vertex]
+            vertexScores[vertex] = score
+            start = starts[vertex]
+            for slot in range(start, start + remaining[vertex]):
+                triangle = adjacency[slot]
+                triangleScores[triangle] += delta
+                if position < cacheSize and triangleScores[triangle] > bestScore:
+                    bestScore = triangleScores[triangle]
+                    bestTriangle = triangle
+
+    return result
+
+
+def optimize_mesh(mesh, epsilon=0.0, cacheSize=32):
+    """
+    Weld the vertices of `mesh`, remap its face sets and reorder the triangles of its triangle list face sets
+    for the post-transform cache, replacing its vertex data and indices.
+
+    Returns:
+        A `MeshReport` with the vertex counts and the ACMR of the triangle lists before and after.
+    """
+    report = MeshReport()
+    vertexData, remap = weld_vertices(mesh.vertexData, epsilon)
+    report.vertexCountBefore = mesh.vertexData.vertexCount
+    report.vertexCountAfter = vertexData.vertexCount
+
+    triangleCount = 0
+    missesBefore = 0.0
+    missesAfter = 0.0
+    for faceSet in mesh.faceSets:
+        indices = remap_indices(faceSet.vertices, remap)
+        if not faceSet.triangleStrip:
+            triangles = len(indices) // 3
+            missesBefore += acmr(indices, cacheSize) * triangles
+            indices = reorder_triangles(indices, cacheSize)
+            missesAfter += acmr(indices, cacheSize) * triangles
+            triangleCount += triangles
+        faceSet.vertices = indices
+        faceSet.vertexCount = len(indices)
+    mesh.vertexData = vertexData
+
+    if triangleCount:
+        report.acmrBefore = missesBefore / triangleCount
+        report.acmrAfter = missesAfter / triangleCount
+    return report
+
+
+def optimize_meshes(meshes, epsilon=0.0, cacheSize=32):
+    """
+    Run `optimize_mesh` on every mesh of `meshes`, returning their reports.
+    """
+    return [optimize_mesh(mesh, epsilon, cacheSize) for mesh in meshes]
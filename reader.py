@@ -1,16 +1,79 @@
+import atexit
+import functools
+import io
+import mmap
+import os
+import re
 import string
 import struct
+import sys
+import time
+from array import array
+from itertools import chain
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# bump whenever the decoded output changes, so cached results of older readers are not reused
+READER_VERSION = 2
 
 
 class BinaryReader:
+    """
+    Reads binary data at absolute offsets from an in-memory view of the whole file. Files are memory-mapped when
+    possible, so `read_bytes` and `get_bytes` return zero-copy slices of the mapped file and moving around
+    (`step_in`, `step_out`, `get_utf16`...) never hits the underlying stream.
+    """
     def __init__(self, stream, endianness):
         self.stream = stream;
+        self.mapping = None
+        self.buffer = self.map(stream)
+        self.position = stream.tell() if hasattr(stream, 'tell') else 0
         self.positions = [];
         self.endianness = endianness
+        self.scalars = ScalarCodecs.get(self.endian())
+        self.strings = StringPool(self.buffer, 'utf-16be' if endianness == 'big' else 'utf-16le')
+        self.instrumentation = Instrumentation.default
+        self.validator = Validator()
+        self.bytesRead = 0
+        self.seekCount = 0
+
+    def map(self, stream):
+        """
+        Build the view the reader works on: the object itself for bytes-like input, a read-only memory map for
+        regular files and the full contents for any other stream.
+        """
+        if isinstance(stream, (bytes, bytearray, memoryview, mmap.mmap)):
+            return memoryview(stream)
+        if hasattr(stream, 'fileno'):
+            try:
+                self.mapping = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+                return memoryview(self.mapping)
+            except (OSError, ValueError, io.UnsupportedOperation):
+                pass
+        if hasattr(stream, 'getbuffer'):
+            return stream.getbuffer()
+        position = stream.tell()
+        stream.seek(0)
+        data = stream.read()
+        stream.seek(position)
+        return memoryview(data)
+
+    def close(self):
+        self.buffer.release()
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:
+                # slices handed out by read_bytes are still alive, the mapping is released along with them
+                pass
+            self.mapping = None
 
     def unpack(self, fmt, length=1):
         """
-        Unpack the stream contents according to the specified format in `fmt`.
+        Unpack the buffer contents at the current position according to the specified format in `fmt`.
         For more information about the `fmt` format see: https://docs.python.org/3/library/struct.html
         Args:
             fmt (str): format string.
@@ -18,7 +81,27 @@ class BinaryReader:
         Returns:
             variable: the result according to the specified format.
         """
-        return struct.unpack(fmt, self.stream.read(length))[0]
+        value = struct.unpack_from(fmt, self.buffer, self.position)[0]
+        self.position += length
+        self.bytesRead += length
+        return value
+
+    def unpack_from(self, fmt, offset):
+        return struct.unpack_from(fmt, self.buffer, offset)
+
+    def read_struct(self, codec):
+        """
+        Unpack the values of a precompiled `struct.Struct` at the current position.
+        """
+        values = codec.unpack_from(self.buffer, self.position)
+        self.position += codec.size
+        self.bytesRead += codec.size
+        return values
+
+    def get_struct(self, codec, offset):
+        self.seekCount += 1
+        self.bytesRead += codec.size
+        return codec.unpack_from(self.buffer, offset)
 
     def endian(self) -> string:
         if self.endianness == 'big':
@@ -28,18 +111,19 @@ class BinaryReader:
         raise Exception('incorrectness endiannes')
 
     def assert_read(self, count, fmt, expected_values) -> int:
-        value = self.unpack(fmt, count)
-        for expected_value in expected_values:
-            if value == expected_value:
-                return value
+        offset = self.position
+        return self.assert_value(self.unpack(fmt, count), expected_values, offset)
 
-        raise Exception('Failed value assertion read. Expected {}, got {}'.format(expected_value, value))
+    def assert_value(self, value, expected_values, offset=None, field=None):
+        return self.validator.check_value(value, expected_values, offset, field)
 
     def assert_int32(self, *expected_values) -> int:
-        return self.assert_read(4, "%si" % self.endian(), expected_values)
+        offset = self.position
+        return self.assert_value(self.read_struct(self.scalars.int32)[0], expected_values, offset)
 
     def assert_int16(self, *expected_values) -> int:
-        return self.assert_read(2, "%sh" % self.endian(), expected_values)
+        offset = self.position
+        return self.assert_value(self.read_struct(self.scalars.int16)[0], expected_values, offset)
 
     def assert_bool(self, *expected_values):
         return self.assert_read(1, "?", expected_values)
@@ -51,40 +135,79 @@ class BinaryReader:
         return self.unpack("B", 1)
 
     def read_int32(self) -> int:
-        return self.unpack("%si" % self.endian(), 4)
+        return self.read_struct(self.scalars.int32)[0]
 
     def read_uint16(self) -> int:
-        return self.unpack("%sH" % self.endian(), 4)
+        return self.read_struct(self.scalars.uint16)[0]
 
     def read_uint32(self) -> int:
-        return self.unpack("%sI" % self.endian(), 4)
+        return self.read_struct(self.scalars.uint32)[0]
 
     def read_int16(self) -> int:
-        return self.unpack('%sh' % self.endian(), 2)
+        return self.read_struct(self.scalars.int16)[0]
 
     def read_bool(self) -> bool:
         return self.unpack('?')
 
     def read_float(self) -> float:
-        return self.unpack("%sf" % self.endian(), 4)
+        return self.read_struct(self.scalars.float)[0]
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += len(self.buffer)
+        self.position = offset
 
     def skip(self, count):
-        self.stream.seek(count, 1)
+        self.position += count
 
     def get_bytes(self, offset, count):
-        self.step_in(offset)
-        result = self.read_bytes(count)
-        self.step_out()
-        return result;
+        """
+        Zero-copy slice of `count` bytes at `offset`. The position is left untouched, so several threads can
+        share the reader for these reads.
+        """
+        end = offset + count
+        if offset < 0 or end > len(self.buffer):
+            raise Exception('Unexpected end of buffer: expected {} bytes at offset {}, buffer is {} bytes'.format(count, offset, len(self.buffer)))
+        self.seekCount += 1
+        self.bytesRead += count
+        return self.buffer[offset:end];
 
     def get_int32s(self, offset, count):
-        return self.get_values(self.read_int32, offset, count)
+        return self.get_array('i', offset, count)
 
     def get_uint32s(self, offset, count):
-        return self.get_values(self.read_int32, offset, count)
+        return self.get_array('I', offset, count)
 
     def get_uint16s(self, offset, count):
-        return self.get_values(self.read_int16, offset, count)
+        return self.get_array('H', offset, count)
+
+    def get_array(self, typecode, offset, count):
+        result = array(typecode)
+        return self.decode_array(result, self.get_bytes(offset, count * result.itemsize))
+
+    def read_array(self, typecode, count):
+        """
+        Read `count` values with a single copy into a typed array, swapping the bytes when the file endianness
+        differs from the machine's.
+        Args:
+            typecode (str): `array` type code of the values.
+            count (int): amount of values to read.
+        Returns:
+            array: the values read.
+        """
+        result = array(typecode)
+        return self.decode_array(result, self.read_bytes(count * result.itemsize))
+
+    def decode_array(self, result, data):
+        result.frombytes(data)
+        if self.endianness != sys.byteorder:
+            result.byteswap()
+        return result
 
     def get_values(self, function, offset, count):
         self.step_in(offset)
@@ -102,52 +225,329 @@ class BinaryReader:
         return result
 
     def read_bytes(self, count):
-        bytes = bytearray(self.stream.read(count));
-        return bytes;
+        """
+        Zero-copy slice of the next `count` bytes.
+        """
+        end = self.position + count
+        if end > len(self.buffer):
+            raise Exception('Unexpected end of buffer: expected {} bytes, got {}'.format(count, len(self.buffer) - self.position))
+        result = self.buffer[self.position:end]
+        self.position = end
+        self.bytesRead += count
+        return result;
 
     def read_utf16(self):
-        bytes = b'';
-        bytePair = self.stream.read(2)
-        while bytePair[0] != 0 or bytePair[1] != 0:
-            bytes = bytes + bytePair
-            bytePair = self.stream.read(2)
-
-        encoding = ''
-        if self.endianness == 'big':
-            encoding = 'utf-16be'
-        elif self.endianness == 'little':
-            encoding = 'utf-16le'
-
-        result = bytes.decode(encoding)
+        end = self.strings.find_terminator(self.position)
+        result = self.strings.get(self.position)
+        self.position = end + 2
         return result;
 
     def get_utf16(self, offset) -> string:
-        startPos = self.stream.tell();
-        self.stream.seek(offset);
-        result = self.read_utf16();
-        self.stream.seek(startPos)
-        return result;
+        self.seekCount += 1
+        return self.strings.get(offset)
 
     def step_in(self, offset):
-        self.positions.append(self.stream.tell())
-        self.stream.seek(offset)
+        self.positions.append(self.position)
+        self.position = offset
+        self.seekCount += 1
 
     def step_out(self):
         if (len(self.positions) <= 0):
             raise Exception('No positions found on position stack')
-        position = self.positions.pop()
-        self.stream.seek(position)
+        self.position = self.positions.pop()
 
     def read_sbyte(self):
         byte = self.read_byte()
         return (byte + 2**7) % 2**8 - 2**7
 
     def read_vector3(self):
-        vector = Vector3(self.read_float(), self.read_float(), self.read_float())
+        vector = Vector3(*self.read_struct(self.scalars.vector3))
         return vector
 
+    def read_records(self, record, count):
+        """
+        Decode a table of `count` fixed-size records with a single read, checking their fields in bulk.
+        Args:
+            record (Record): precompiled record codec.
+            count (int): amount of records in the table.
+        Returns:
+            list: one tuple of values per record.
+        """
+        offset = self.position
+        records = list(record.codec.iter_unpack(self.read_bytes(record.codec.size * count)))
+        if self.validator.enabled:
+            self.validator.check_records(record, records, offset)
+        return records
+
+    def get_records(self, record, offset, count):
+        self.step_in(offset)
+        result = self.read_records(record, count)
+        self.step_out()
+        return result
+
+
+class StringPool:
+    """
+    Null-terminated strings of a buffer, decoded once per offset. The strings are interned, so names and paths
+    shared by many materials and files (MTDs, textures...) are kept only once during a batch run. `width` is the
+    size of a code unit: 2 for UTF-16, 1 for single and multi-byte encodings such as Shift-JIS.
+    """
+    chunkSize = 256
+
+    def __init__(self, buffer, encoding, width=2):
+        self.buffer = buffer
+        self.encoding = encoding
+        self.width = width
+        self.terminator = bytes(width)
+        self.strings = {}
+        self.bytesRead = 0
+
+    def get(self, offset):
+        text = self.strings.get(offset)
+        if text is None:
+            end = self.find_terminator(offset)
+            text = sys.intern(str(self.buffer[offset:end], self.encoding))
+            self.strings[offset] = text
+            self.bytesRead += end + self.width - offset
+        return text
+
+    def find_terminator(self, offset):
+        """
+        Offset of the null code unit ending the string at `offset`, searched a chunk of the buffer at a time.
+        """
+        start = offset
+        chunkSize = self.chunkSize
+        width = self.width
+        while True:
+            chunk = bytes(self.buffer[start:start + chunkSize])
+            if len(chunk) < width:
+                raise Exception('Unterminated string at offset {}'.format(offset))
+            index = chunk.find(self.terminator)
+            while index >= 0 and (start + index - offset) % width:
+                index = chunk.find(self.terminator, index + 1)
+            if index >= 0:
+                return start + index
+            start += len(chunk) - len(chunk) % width
+            chunkSize *= 2
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.seeks = 0
+        self.records = 0
+
+
+class Instrumentation:
+    """
+    Collects wall time, bytes consumed, seeks and records for each parse stage of the readers it is attached to,
+    and passes the `StageStats` of every single stage call to its hooks. Readers pick up `Instrumentation.default`,
+    which is only set when the FLV_INSTRUMENT environment variable is: the summary is then printed to stderr at exit,
+    or appended to the file FLV_INSTRUMENT names. Without instrumentation, stages cost one attribute check.
+    """
+    default = None
+
+    def __init__(self, hooks=()):
+        self.stages = {}
+        self.hooks = list(hooks)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def record(self, call):
+        stats = self.stages.get(call.name)
+        if stats is None:
+            stats = self.stages[call.name] = StageStats(call.name)
+        stats.calls += 1
+        stats.seconds += call.seconds
+        stats.bytes += call.bytes
+        stats.seeks += call.seeks
+        stats.records += call.records
+        for hook in self.hooks:
+            hook(call)
+
+    def merge(self, stages):
+        """
+        Add the `StageStats` collected elsewhere, e.g. by worker processes.
+        """
+        for other in stages.values():
+            stats = self.stages.get(other.name)
+            if stats is None:
+                stats = self.stages[other.name] = StageStats(other.name)
+            stats.calls += other.calls
+            stats.seconds += other.seconds
+            stats.bytes += other.bytes
+            stats.seeks += other.seeks
+            stats.records += other.records
+
+    def summary(self):
+        lines = ['{:<16}{:>8}{:>12}{:>14}{:>10}{:>10}{:>10}'.format('stage', 'calls', 'ms', 'bytes', 'MB/s', 'seeks', 'records')]
+        for stats in sorted(self.stages.values(), key=lambda stats: -stats.seconds):
+            throughput = stats.bytes / stats.seconds / (1024 * 1024) if stats.seconds > 0 else 0
+            lines.append('{:<16}{:>8}{:>12.2f}{:>14}{:>10.1f}{:>10}{:>10}'.format(
+                stats.name, stats.calls, stats.seconds * 1000, stats.bytes, throughput, stats.seeks, stats.records))
+        return '\n'.join(lines)
+
+    def dump(self, target):
+        if target in ('1', 'stderr'):
+            print(self.summary(), file=sys.stderr)
+        else:
+            with open(target, 'a') as stream:
+                stream.write(self.summary() + '\n')
+
+
+def instrumented(name, count=len):
+    """
+    Report every call of the decorated reader method as the `name` stage, `count` giving the amount of records
+    parsed from the method's result.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            instrumentation = self.instrumentation
+            if instrumentation is None:
+                return method(self, *args, **kwargs)
+
+            bytesRead = self.bytesRead + self.strings.bytesRead
+            seekCount = self.seekCount
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            call = StageStats(name)
+            call.calls = 1
+            call.seconds = time.perf_counter() - start
+            call.bytes = self.bytesRead + self.strings.bytesRead - bytesRead
+            call.seeks = self.seekCount - seekCount
+            call.records = count(result)
+            instrumentation.record(call)
+            return result
+        return wrapper
+    return decorator
+
+
+if os.environ.get('FLV_INSTRUMENT'):
+    Instrumentation.default = Instrumentation()
+    atexit.register(Instrumentation.default.dump, os.environ['FLV_INSTRUMENT'])
+
+
+class ValidationIssue:
+    def __init__(self, offset, field, expected, actual):
+        self.offset = offset
+        self.field = field
+        self.expected = tuple(expected)
+        self.actual = actual
+
+    def __str__(self):
+        where = ' at 0x{:X}'.format(self.offset) if self.offset is not None else ''
+        if self.field is not None:
+            where += ' ({})'.format(self.field)
+        expected = self.expected[0] if len(self.expected) == 1 else 'one of {}'.format(self.expected)
+        return 'Failed value assertion read{}. Expected {}, got {}'.format(where, expected, self.actual)
+
+
+class ValidationError(Exception):
+    def __init__(self, issues):
+        super().__init__('\n'.join(str(issue) for issue in issues))
+        self.issues = issues
+
+
+class Validator:
+    """
+    Checks the reserved fields and the known values of what the readers parse. In 'strict' mode the first
+    discrepancy raises a `ValidationError`, in 'collect' mode every discrepancy is added to `issues` and parsing
+    goes on, and 'off' skips the checks entirely for trusted input. Readers start with `Validator.defaultMode`,
+    which the FLV_VALIDATE environment variable sets.
+    """
+    modes = ('strict', 'collect', 'off')
+    defaultMode = os.environ.get('FLV_VALIDATE', 'strict')
+
+    def __init__(self, mode=None):
+        if mode is None:
+            mode = Validator.defaultMode
+        if mode not in self.modes:
+            raise Exception('Unknown validation mode {}, expected one of {}'.format(mode, ', '.join(self.modes)))
+        self.mode = mode
+        self.enabled = mode != 'off'
+        self.issues = []
+
+    def report(self, issue):
+        if self.mode == 'strict':
+            raise ValidationError([issue])
+        self.issues.append(issue)
+
+    def check_value(self, value, expected_values, offset=None, field=None):
+        if self.enabled and value not in expected_values:
+            self.report(ValidationIssue(offset, field, expected_values, value))
+        return value
+
+    def check_records(self, record, records, offset):
+        """
+        Check in bulk the fields of a table of unpacked `records` starting at `offset`, a column at a time.
+        """
+        size = record.codec.size
+        for index, expected_values in record.checks:
+            for number, values in enumerate(records):
+                if values[index] not in expected_values:
+                    self.report(ValidationIssue(offset + number * size + record.fieldOffsets[index],
+                                                '{}[{}] field {}'.format(record.name, number, index),
+                                                expected_values, values[index]))
+
+
+class ScalarCodecs:
+    """
+    Precompiled `struct.Struct` codecs of the scalar types for one endianness.
+    """
+    cache = {}
+
+    def __init__(self, endian):
+        self.int16 = struct.Struct(endian + 'h')
+        self.uint16 = struct.Struct(endian + 'H')
+        self.int32 = struct.Struct(endian + 'i')
+        self.uint32 = struct.Struct(endian + 'I')
+        self.float = struct.Struct(endian + 'f')
+        self.vector3 = struct.Struct(endian + '3f')
+
+    @classmethod
+    def get(cls, endian):
+        codecs = cls.cache.get(endian)
+        if codecs is None:
+            codecs = cls.cache[endian] = cls(endian)
+        return codecs
+
+
+class Record:
+    """
+    Precompiled codec of a fixed-size record, along with the indices of its reserved fields which must be zero and
+    the (index, expected values) `checks` of its other known fields. Negative indices count from the end.
+    """
+    def __init__(self, endian, fmt, reserved=(), checks=(), name='record'):
+        self.codec = struct.Struct(endian + fmt)
+        self.name = name
+        self.fieldOffsets = self.field_offsets(endian, fmt)
+        self.reserved = tuple(reserved)
+        self.checks = tuple((index % len(self.fieldOffsets), tuple(expected_values))
+                            for index, expected_values in chain(((index, (0,)) for index in self.reserved), checks))
+
+    @staticmethod
+    def field_offsets(endian, fmt):
+        """
+        Byte offset of every field of the record format `fmt`, in unpacking order.
+        """
+        offsets = []
+        size = 0
+        for count, code in re.findall(r'(\d*)([a-zA-Z?])', fmt):
+            itemSize = struct.calcsize(endian + code)
+            for i in range(int(count or 1)):
+                offsets.append(size)
+                size += itemSize
+        return offsets
+
 
 class Vector3:
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -155,6 +555,8 @@ class Vector3:
 
 
 class Vector4:
+    __slots__ = ('x', 'y', 'z', 'w')
+
     def __init__(self, x, y, z, w):
         self.x = x
         self.y = y
@@ -162,204 +564,280 @@ class Vector4:
         self.w = w
 
 
-class FlvReader(BinaryReader):
-    def read_dummy(self):
-        Position = self.read_vector3();
-
-        Unk0C = self.read_byte();
-        Unk0D = self.read_byte();
-        Unk0E = self.read_int16();
-
-        Forward = self.read_vector3();
+class FlvRecords:
+    """
+    Precompiled codecs of the fixed-size FLVER records for one endianness. The mesh record changes with the
+    version, so its codecs are built on demand.
+    """
+    cache = {}
+
+    def __init__(self, endian):
+        self.endian = endian
+        self.header = Record(endian, '8i6f2iB??Bhh3i9i', (19, 20, 26, 27, 29, 30, 31, 32, 33), [
+            (0, FlvReader.versions), (16, (0x00, 0x10)), (17, (True,)), (21, (0, -1)), (28, (0, 1, 2, 3, 4))],
+            name='header')
+        self.dummy = Record(endian, '3fBBh3fhh3fh??4i', (19, 20), name='dummy')
+        self.material = Record(endian, '8i', (7,), name='material')
+        self.bone = Record(endian, '3fi3fhh3fhh3fi3f13i', range(21, 34), name='bone')
+        self.faceSet = Record(endian, 'I??BB6i', (8, 10), [(9, (0, 16, 32))], name='faceSet')
+        self.vertexBuffer = Record(endian, '8i', (4, 5), name='vertexBuffer')
+        self.bufferLayout = Record(endian, '4i', (1, 2), name='bufferLayout')
+        self.bufferLayoutMember = Record(endian, 'iiIIi', (), [(0, (0, 1, 2))], name='bufferLayoutMember')
+        self.texture = Record(endian, '2i2fB?BB3i', (6, 7), [(4, (0, 1, 2))], name='texture')
+        self.sekiroUnk = Record(endian, '2h2I5i', range(4, 9), name='sekiroUnk')
+        self.sekiroUnkMember = Record(endian, '4hii', (5,), name='sekiroUnkMember')
+        self.meshes = {}
+
+    @classmethod
+    def get(cls, endian):
+        records = cls.cache.get(endian)
+        if records is None:
+            records = cls.cache[endian] = cls(endian)
+        return records
+
+    def mesh(self, version):
+        record = self.meshes.get(version)
+        if record is None:
+            fmt = '?3Bii'
+            reserved = [1, 2, 3, 5]
+            if version <= 0x20010:
+                reserved.append(6)
+                fmt += 'i'
+            fmt += 'iii'
+            if version >= 0x20013:
+                fmt += 'i'
+            fmt += 'i2i2i'
+            checks = [(-7 if version >= 0x20013 else -6, (0, 1, 10)), (-2, (1, 2, 3))]
+            record = self.meshes[version] = Record(self.endian, fmt, reserved, checks, name='mesh')
+        return record
+
+
+def read_endianness(stream):
+    """
+    Read the FLVER magic and endianness marker at the current position of `stream`.
+    Returns:
+        str: 'big' or 'little'.
+    """
+    identifier = stream.read(6)
+    endianness = stream.read(2)
+    if identifier != b'FLVER\x00':
+        raise Exception('Identifier unrecognized: expected FLVER, got {}'.format(identifier))
+    if endianness == b'B\x00':
+        return 'big'
+    elif endianness == b'L\x00':
+        return 'little'
+    raise Exception('Endianness unrecognized: expected either B or L, got {}'.format(endianness))
 
-        ReferenceID = self.read_int16();
-        DummyBoneIndex = self.read_int16();
 
-        Upward = self.read_vector3();
+class FlvReader(BinaryReader):
+    versions = (0x20005, 0x20007, 0x20009, 0x2000B, 0x2000C, 0x2000D, 0x2000E, 0x2000F, 0x20010, 0x20013, 0x20014,
+                0x20016, 0x2001A)
 
-        AttachBoneIndex = self.read_int16();
-        Flag1 = self.read_boolean();
-        Flag2 = self.read_boolean();
+    def __init__(self, stream, endianness):
+        super().__init__(stream, endianness)
+        self.records = FlvRecords.get(self.endian())
+
+    @instrumented('header', lambda header: 1)
+    def read_header(self):
+        values = self.read_records(self.records.header, 1)[0]
+        header = FlverHeader()
+        header.version = values[0]
+        (header.dataOffset, header.dataSize, header.dummyCount, header.materialCount, header.boneCount,
+         header.meshCount, header.vertexBufferCount) = values[1:8]
+        header.boundingBoxMin = Vector3(*values[8:11])
+        header.boundingBoxMax = Vector3(*values[11:14])
+        header.unk40, header.totalFaceCount = values[14:16]
+        header.unk48 = values[16]
+        header.unk4A = values[18]
+        header.unk4E = values[21]
+        header.faceSetCount, header.bufferLayoutCount, header.textureCount, header.unk5C = values[22:26]
+        header.unk68 = values[28]
+        return header
 
-        Unk30 = self.read_int32();
-        Unk34 = self.read_int32();
-        self.assert_int32(0);
-        self.assert_int32(0);
+    def read_dummy(self):
+        return self.read_dummies(1)[0]
+
+    @instrumented('dummies')
+    def read_dummies(self, count):
+        dummies = []
+        for values in self.read_records(self.records.dummy, count):
+            dummy = Dummy()
+            dummy.position = Vector3(*values[0:3])
+            dummy.unk0C, dummy.unk0D, dummy.unk0E = values[3:6]
+            dummy.forward = Vector3(*values[6:9])
+            dummy.referenceID, dummy.dummyBoneIndex = values[9:11]
+            dummy.upward = Vector3(*values[11:14])
+            dummy.attachBoneIndex, dummy.flag1, dummy.flag2, dummy.unk30, dummy.unk34 = values[14:19]
+            dummies.append(dummy)
+        return dummies
 
     def read_material(self):
-        material = Material();
-        material.nameOffset = self.read_int32();
-        material.mtdOffset = self.read_int32();
-        material.textureCount = self.read_int32();
-        material.textureIndex = self.read_int32();
-        material.flags = self.read_int32();
-        material.gxOffset = self.read_int32();
-        material.unk18 = self.read_int32();
-        self.assert_int32(0);
-
-        material.name = self.get_utf16(material.nameOffset);
-        material.mtd = self.get_utf16(material.mtdOffset);
-
-        if material.gxOffset > 0:
-            self.step_in(material.gxOffset)
-            while True:
-                section = self.read_int32()
-                self.read_int32()
-                self.skip(self.read_int32() - 0xC)
-                if section == 0x7FFFFFFF:
-                    break;
-
-            gxbytes = self.get_bytes(material.gxOffset, self.stream.tell() - material.gxOffset)
-            material.gxbytes = gxbytes
-            self.step_out()
-        return material
+        return self.read_materials(1)[0]
+
+    @instrumented('materials')
+    def read_materials(self, count):
+        materials = []
+        for values in self.read_records(self.records.material, count):
+            material = Material();
+            (material.nameOffset, material.mtdOffset, material.textureCount, material.textureIndex,
+             material.flags, material.gxOffset, material.unk18) = values[0:7]
+
+            material.name = self.get_utf16(material.nameOffset);
+            material.mtd = self.get_utf16(material.mtdOffset);
+
+            if material.gxOffset > 0:
+                self.step_in(material.gxOffset)
+                while True:
+                    section = self.read_int32()
+                    self.read_int32()
+                    self.skip(self.read_int32() - 0xC)
+                    if section == 0x7FFFFFFF:
+                        break;
+
+                gxbytes = self.get_bytes(material.gxOffset, self.tell() - material.gxOffset)
+                material.gxbytes = gxbytes
+                self.step_out()
+            materials.append(material)
+        return materials
 
     def read_bones(self):
-        Translation = self.read_vector3();
-        nameOffset = self.read_int32();
-        Rotation = self.read_vector3();
-        ParentIndex = self.read_int16();
-        ChildIndex = self.read_int16();
-        Scale = self.read_vector3();
-        NextSiblingIndex = self.read_int16();
-        PreviousSiblingIndex = self.read_int16();
-        BoundingBoxMin = self.read_vector3();
-        Unk3C = self.read_int32();
-        BoundingBoxMax = self.read_vector3();
-
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        Name = self.get_utf16(nameOffset)
+        return self.read_bone_table(1)[0]
+
+    @instrumented('bones')
+    def read_bone_table(self, count):
+        bones = []
+        for values in self.read_records(self.records.bone, count):
+            bone = Bone()
+            bone.translation = Vector3(*values[0:3])
+            bone.nameOffset = values[3]
+            bone.rotation = Vector3(*values[4:7])
+            bone.parentIndex, bone.childIndex = values[7:9]
+            bone.scale = Vector3(*values[9:12])
+            bone.nextSiblingIndex, bone.previousSiblingIndex = values[12:14]
+            bone.boundingBoxMin = Vector3(*values[14:17])
+            bone.unk3C = values[17]
+            bone.boundingBoxMax = Vector3(*values[18:21])
+            bone.name = self.get_utf16(bone.nameOffset)
+            bones.append(bone)
+        return bones
 
     def read_meshes(self, version):
-        mesh = Mesh()
-        mesh.dynamic = self.read_bool();
-        self.assert_byte(0);
-        self.assert_byte(0);
-        self.assert_byte(0);
-
-        mesh.materialIndex = self.read_int32();
-        self.assert_int32(0);
-        if version <= 0x20010:
-            self.assert_int32(0);
-        mesh.defaultBoneIndex = self.read_int32();
-
-        mesh.boneCount = self.read_int32();
-        mesh.unk1 = self.assert_int32(0, 1, 10);
-        if version >= 0x20013:
-            mesh.boundingBoxOffset = self.read_int32();
-            self.step_in(mesh.boundingBoxOffset);
-            mesh.boundingBoxMin = self.read_vector3();
-            mesh.boundingBoxMax = self.read_vector3();
-            if version >= 0x2001A:
-                mesh.boundingBoxUnk = self.read_vector3();
-            self.step_out();
-        mesh.boneOffset = self.read_int32();
-        mesh.boneIndices = self.get_int32s(mesh.boneOffset, mesh.boneCount);
-
-        mesh.faceSetCount = self.read_int32();
-        mesh.faceSetOffset = self.read_int32();
-        mesh.faceSetIndices = self.get_int32s(mesh.faceSetOffset, mesh.faceSetCount);
-
-        mesh.vertexBufferCount = self.assert_int32(1, 2, 3);
-        mesh.vertexBufferOffset = self.read_int32();
-        mesh.vertexBufferIndices = self.get_int32s(mesh.vertexBufferOffset, mesh.vertexBufferCount)
-        return mesh
+        return self.read_mesh_table(1, version)[0]
+
+    @instrumented('meshes')
+    def read_mesh_table(self, count, version):
+        records = self.read_records(self.records.mesh(version), count)
+        meshes = []
+        for values in records:
+            mesh = Mesh()
+            mesh.dynamic = values[0]
+            mesh.materialIndex = values[4]
+            values = values[-9:] if version >= 0x20013 else values[-8:]
+            mesh.defaultBoneIndex, mesh.boneCount, mesh.unk1 = values[0:3]
+            if version >= 0x20013:
+                mesh.boundingBoxOffset = values[3]
+                mesh.boundingBoxMin = Vector3(*self.get_struct(self.scalars.vector3, mesh.boundingBoxOffset))
+                mesh.boundingBoxMax = Vector3(*self.get_struct(self.scalars.vector3, mesh.boundingBoxOffset + 12))
+                if version >= 0x2001A:
+                    mesh.boundingBoxUnk = Vector3(*self.get_struct(self.scalars.vector3, mesh.boundingBoxOffset + 24))
+            (mesh.boneOffset, mesh.faceSetCount, mesh.faceSetOffset,
+             mesh.vertexBufferCount, mesh.vertexBufferOffset) = values[-5:]
+            mesh.boneIndices = self.get_int32s(mesh.boneOffset, mesh.boneCount);
+            mesh.faceSetIndices = self.get_int32s(mesh.faceSetOffset, mesh.faceSetCount);
+            mesh.vertexBufferIndices = self.get_int32s(mesh.vertexBufferOffset, mesh.vertexBufferCount)
+            meshes.append(mesh)
+        return meshes
 
     def read_face_set(self, dataOffset):
-        faceSet = FaceSet()
-        faceSet.flags = self.read_uint32();
-
-        faceSet.triangleStrip = self.read_bool();
-        faceSet.cullBackfaces = self.read_bool();
-        faceSet.unk06 = self.read_byte();
-        faceSet.unk07 = self.read_byte();
-
-        faceSet.vertexCount = self.read_int32();
-        faceSet.vertexOffset = self.read_int32();
-        faceSet.vertexSize = self.read_int32();
-
-        self.assert_int32(0);
-        faceSet.indexSize = self.assert_int32(0, 16, 32);
-        self.assert_int32(0);
-
+        return self.read_face_sets(1, dataOffset)[0]
+
+    @instrumented('faceSets')
+    def read_face_sets(self, count, dataOffset, readIndices=True):
+        records = self.read_records(self.records.faceSet, count)
+        faceSets = []
+        for values in records:
+            faceSet = FaceSet()
+            (faceSet.flags, faceSet.triangleStrip, faceSet.cullBackfaces, faceSet.unk06, faceSet.unk07,
+             faceSet.vertexCount, faceSet.vertexOffset, faceSet.vertexSize) = values[0:8]
+            faceSet.indexSize = values[9]
+            if readIndices:
+                self.read_face_set_indices(faceSet, dataOffset)
+            faceSets.append(faceSet)
+        return faceSets
+
+    @instrumented('indices')
+    def read_face_set_indices(self, faceSet, dataOffset):
         if faceSet.indexSize == 0 or faceSet.indexSize == 16:
             faceSet.vertices = self.get_uint16s(dataOffset + faceSet.vertexOffset, faceSet.vertexCount)
         elif faceSet.indexSize == 32:
             faceSet.vertices = self.get_uint32s(dataOffset + faceSet.vertexOffset, faceSet.vertexCount)
-
-        return faceSet
+        return faceSet.vertices
 
     def read_vertex_buffer(self):
-        vBuffer = VertexBuffer();
-        vBuffer.bufferIndex = self.read_int32();
-        vBuffer.layoutIndex = self.read_int32();
-        vBuffer.vertexSize = self.read_int32();
-        vBuffer.vertexCount = self.read_int32();
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(vBuffer.vertexSize * vBuffer.vertexCount);
-        vBuffer.bufferOffset = self.read_int32();
-        return vBuffer
+        return self.read_vertex_buffers(1)[0]
+
+    @instrumented('vertexBuffers')
+    def read_vertex_buffers(self, count):
+        vertexBuffers = []
+        record = self.records.vertexBuffer
+        offset = self.position
+        for index, values in enumerate(self.read_records(record, count)):
+            vBuffer = VertexBuffer();
+            vBuffer.bufferIndex, vBuffer.layoutIndex, vBuffer.vertexSize, vBuffer.vertexCount = values[0:4]
+            self.assert_value(values[6], (vBuffer.vertexSize * vBuffer.vertexCount,),
+                              offset + index * record.codec.size + record.fieldOffsets[6],
+                              'vertexBuffer[{}] field 6'.format(index))
+            vBuffer.bufferOffset = values[7]
+            vertexBuffers.append(vBuffer)
+        return vertexBuffers
 
     def read_buffer_layout(self):
-        bufferLayout = BufferLayout();
-        bufferLayout.memberCount = self.read_int32();
-        self.assert_int32(0);
-        self.assert_int32(0);
-        bufferLayout.memberOffset = self.read_int32();
-        self.step_in(bufferLayout.memberOffset);
-        for i in range(0, bufferLayout.memberCount):
-            bufferLayout.members.append(self.read_buff_layout_member())
-        self.step_out();
-        return bufferLayout
-
-    def read_buff_layout_member(self):
-        buffLayoutMember = BufferLayoutMember();
-        buffLayoutMember.unk00 = self.assert_int32(0,1,2)
-        buffLayoutMember.structOffset = self.read_int32();
-        buffLayoutMember.type = self.read_uint32()
-        buffLayoutMember.semantic = self.read_uint32()
-        buffLayoutMember.index = self.read_int32()
-        return buffLayoutMember
+        return self.read_buffer_layouts(1)[0]
+
+    @instrumented('bufferLayouts')
+    def read_buffer_layouts(self, count):
+        bufferLayouts = []
+        for values in self.read_records(self.records.bufferLayout, count):
+            bufferLayout = BufferLayout();
+            bufferLayout.memberCount = values[0]
+            bufferLayout.memberOffset = values[3]
+            members = self.get_records(self.records.bufferLayoutMember, bufferLayout.memberOffset, bufferLayout.memberCount)
+            for memberValues in members:
+                buffLayoutMember = BufferLayoutMember();
+                (buffLayoutMember.unk00, buffLayoutMember.structOffset, buffLayoutMember.type,
+                 buffLayoutMember.semantic, buffLayoutMember.index) = memberValues
+                bufferLayout.members.append(buffLayoutMember)
+            bufferLayouts.append(bufferLayout)
+        return bufferLayouts
 
     def read_texture(self):
-        pathOffset = self.read_int32();
-        typeOffset = self.read_int32();
-        ScaleX = self.read_float();
-        ScaleY = self.read_float();
-
-        Unk10 = self.assert_byte(0, 1, 2);
-        Unk11 = self.read_bool();
-        self.assert_byte(0);
-        self.assert_byte(0);
-
-        Unk14 = self.read_int32();
-        Unk18 = self.read_int32();
-        Unk1C = self.read_int32();
-
-        Type = self.get_utf16(typeOffset);
-        Path = self.get_utf16(pathOffset)
-
-    def read_vertices(self, mesh, bufferLayouts, dataOffset, version):
+        return self.read_textures(1)[0]
+
+    @instrumented('textures')
+    def read_textures(self, count):
+        records = self.read_records(self.records.texture, count)
+        textures = []
+        for values in records:
+            texture = Texture()
+            texture.pathOffset, texture.typeOffset, texture.scaleX, texture.scaleY = values[0:4]
+            texture.unk10, texture.unk11 = values[4:6]
+            texture.unk14, texture.unk18, texture.unk1C = values[8:11]
+            texture.type = self.get_utf16(texture.typeOffset);
+            texture.path = self.get_utf16(texture.pathOffset)
+            textures.append(texture)
+        return textures
+
+    @instrumented('vertices', lambda vertexData: vertexData.vertexCount)
+    def read_vertices(self, mesh, bufferLayouts, dataOffset, version, precision=()):
         vertexCount = mesh.vertexBuffers[0].vertexCount
+        vertexData = VertexData(vertexCount)
         for vertexBuffer in mesh.vertexBuffers:
             layout = bufferLayouts[vertexBuffer.layoutIndex]
-            self.step_in(dataOffset + vertexBuffer.bufferOffset)
-            for i in range(0, vertexCount):
-                self.read_vertex(layout, vertexBuffer.vertexSize, version)
-            self.step_out()
+            decoder = layout.decoder(vertexBuffer.vertexSize, version, self.endian(), precision)
+            buffer = self.get_bytes(dataOffset + vertexBuffer.bufferOffset, vertexBuffer.vertexSize * vertexCount)
+            decoder.decode(buffer, vertexCount, vertexData, self.validator, dataOffset + vertexBuffer.bufferOffset)
+        mesh.vertexData = vertexData
+        return vertexData
 
     #def readBuffer(self, vertexBuffer, bufferLayouts, dataOffset, version):
     #    print()
@@ -414,7 +892,7 @@ class FlvReader(BinaryReader):
                     read_func = self.read_byte
                     typeMaxValue = 127
                 elif member.type == BufferLayoutMember.Short4toFloat4B:
-                    read_func = self.read_in16
+                    read_func = self.read_int16
                     typeMaxValue = 32767
                 elif member.type == BufferLayoutMember.Float4:
                     read_func = self.read_float
@@ -483,36 +961,18 @@ class FlvReader(BinaryReader):
 
         if currentSize < vertexSize:
             self.read_bytes(vertexSize-currentSize)
+        return positions, boneWeights, boneIndices, normals, tangents, uvs, colors
 
+    @instrumented('sekiroUnk', lambda result: 1)
     def read_sekiro_unk(self):
-        count1 = self.read_int16();
-        count2 = self.read_int16();
-        offset1 = self.read_uint32();
-        offset2 = self.read_uint32();
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-        self.assert_int32(0);
-
-        self.step_in(offset1);
-        for i in range(0, count1):
-            self.read_sekiro_unk_member()
-        self.step_out();
-
-        self.step_in(offset2);
-        for i in range(0, count2):
-            self.read_sekiro_unk_member()
-        self.step_out();
-
-    def read_sekiro_unk_member(self):
-        Unk00 = self.read_int16s(4);
-        Index = self.read_int32();
-        self.assert_int32(0)
-        pass
+        count1, count2, offset1, offset2 = self.read_records(self.records.sekiroUnk, 1)[0][0:4]
+        self.get_records(self.records.sekiroUnkMember, offset1, count1)
+        self.get_records(self.records.sekiroUnkMember, offset2, count2)
 
 
 class Color:
+    __slots__ = ('a', 'r', 'g', 'b')
+
     def __init__(self, a, r, g, b):
         self.a =a
         self.r =r
@@ -520,7 +980,104 @@ class Color:
         self.b =b
 
 
+class FlverHeader:
+    __slots__ = (
+        'version', 'dataOffset', 'dataSize', 'dummyCount', 'materialCount', 'boneCount', 'meshCount',
+        'vertexBufferCount', 'boundingBoxMin', 'boundingBoxMax', 'unk40', 'totalFaceCount', 'unk48', 'unk4A',
+        'unk4E', 'faceSetCount', 'bufferLayoutCount', 'textureCount', 'unk5C', 'unk68'
+    )
+
+    def __init__(self):
+        self.version = 0
+        self.dataOffset = 0
+        self.dataSize = 0
+        self.dummyCount = 0
+        self.materialCount = 0
+        self.boneCount = 0
+        self.meshCount = 0
+        self.vertexBufferCount = 0
+        self.boundingBoxMin = None
+        self.boundingBoxMax = None
+        self.unk40 = 0
+        self.totalFaceCount = 0
+        self.unk48 = 0
+        self.unk4A = False
+        self.unk4E = 0
+        self.faceSetCount = 0
+        self.bufferLayoutCount = 0
+        self.textureCount = 0
+        self.unk5C = 0
+        self.unk68 = 0
+
+
+class Dummy:
+    __slots__ = (
+        'position', 'forward', 'upward', 'referenceID', 'dummyBoneIndex', 'attachBoneIndex', 'flag1', 'flag2',
+        'unk0C', 'unk0D', 'unk0E', 'unk30', 'unk34'
+    )
+
+    def __init__(self):
+        self.position = None
+        self.forward = None
+        self.upward = None
+        self.referenceID = 0
+        self.dummyBoneIndex = -1
+        self.attachBoneIndex = -1
+        self.flag1 = False
+        self.flag2 = False
+        self.unk0C = 0
+        self.unk0D = 0
+        self.unk0E = 0
+        self.unk30 = 0
+        self.unk34 = 0
+
+
+class Bone:
+    __slots__ = (
+        'name', 'nameOffset', 'translation', 'rotation', 'scale', 'parentIndex', 'childIndex', 'nextSiblingIndex',
+        'previousSiblingIndex', 'boundingBoxMin', 'boundingBoxMax', 'unk3C'
+    )
+
+    def __init__(self):
+        self.name = ''
+        self.nameOffset = 0
+        self.translation = None
+        self.rotation = None
+        self.scale = None
+        self.parentIndex = -1
+        self.childIndex = -1
+        self.nextSiblingIndex = -1
+        self.previousSiblingIndex = -1
+        self.boundingBoxMin = None
+        self.boundingBoxMax = None
+        self.unk3C = 0
+
+
+class Texture:
+    __slots__ = (
+        'path', 'type', 'pathOffset', 'typeOffset', 'scaleX', 'scaleY', 'unk10', 'unk11', 'unk14', 'unk18', 'unk1C'
+    )
+
+    def __init__(self):
+        self.path = ''
+        self.type = ''
+        self.pathOffset = 0
+        self.typeOffset = 0
+        self.scaleX = 1
+        self.scaleY = 1
+        self.unk10 = 0
+        self.unk11 = False
+        self.unk14 = 0
+        self.unk18 = 0
+        self.unk1C = 0
+
+
 class Material:
+    __slots__ = (
+        'nameOffset', 'mtdOffset', 'textureCount', 'textureIndex', 'flags', 'gxOffset', 'unk18', 'name', 'mtd',
+        'gxbytes'
+    )
+
     def __init__(self):
         self.nameOffset = 0;
         self.mtdOffset = 0;
@@ -535,6 +1092,8 @@ class Material:
 
 
 class VertexBuffer:
+    __slots__ = ('bufferIndex', 'layoutIndex', 'vertexSize', 'vertexCount', 'bufferOffset')
+
     def __init__(self):
         self.bufferIndex = 0;
         self.layoutIndex = 0;
@@ -544,13 +1103,30 @@ class VertexBuffer:
 
 
 class BufferLayout:
+    __slots__ = ('memberCount', 'memberOffset', 'members', 'decoders')
+
     def __init__(self):
         self.memberCount = 0;
         self.memberOffset = 0
         self.members = []
+        self.decoders = {}
+
+    def decoder(self, vertexSize, version, endian, precision=()):
+        """
+        Compiled `VertexDecoder` for this layout, built once per vertex size, uv factor, endianness and precision
+        (as normalized by `AttributeFormat.normalize`).
+        """
+        key = (vertexSize, version >= 0x20009, endian, precision)
+        decoder = self.decoders.get(key)
+        if decoder is None:
+            decoder = VertexDecoder(self, vertexSize, version, endian, precision)
+            self.decoders[key] = decoder
+        return decoder
 
 
 class BufferLayoutMember:
+    __slots__ = ('unk00', 'structOffset', 'type', 'semantic', 'index')
+
     Float2 = 0x01
     Float3 = 0x02
     Float4 = 0x03
@@ -594,7 +1170,544 @@ class BufferLayoutMember:
             raise Exception('type note defined, got value :  {}'.format(self.type))
 
 
+class VertexDecoder:
+    """
+    Decodes a whole vertex buffer at once. When NumPy is installed the layout is compiled to a structured dtype
+    with one field per member, the buffer is viewed through it without copying and every attribute is computed
+    with whole-array operations, which release the GIL so that buffers decoded by several threads overlap.
+    Without NumPy, every member is compiled to a `struct.Struct` which skips the rest of the vertex, so a single
+    `iter_unpack` over the buffer yields that member for every vertex.
+
+    The values produced are the same as the ones `FlvReader.read_vertex` computes one vertex at a time, stored in
+    the precision `precision` sets for their semantic (float32 by default), see `AttributeFormat`. Positions,
+    normals, bone weights and bone indices are held once per vertex: a layout with several members of one of
+    these semantics keeps the last one, where `read_vertex` returns them all.
+    """
+    numpyTypes = {'b': 'i1', 'B': 'u1', 'h': 'i2', 'H': 'u2', 'f': 'f4'}
+
+    def __init__(self, layout, vertexSize, version, endian, precision=()):
+        self.vertexSize = vertexSize
+        self.precision = dict(precision)
+        self.uvFactor = 1024
+        if version >= 0x20009:
+            self.uvFactor = 2048
+
+        self.members = []
+        currentSize = 0
+        for member in layout.members:
+            size = member.size()
+            if currentSize + size > vertexSize:
+                break
+            fmt = self.member_format(member)
+            if fmt is not None:
+                codec = struct.Struct('%s%dx%s%dx' % (endian, currentSize, fmt, vertexSize - currentSize - size))
+                self.members.append((member, codec, currentSize))
+            currentSize = currentSize + size
+
+        self.dtype = None
+        if numpy is not None:
+            formats = []
+            for member, codec, memberOffset in self.members:
+                fmt = self.member_format(member)
+                formats.append((endian + self.numpyTypes[fmt[1]], (int(fmt[0]),)))
+            self.dtype = numpy.dtype({'names': ['m{}'.format(index) for index in range(len(self.members))],
+                                      'formats': formats, 'offsets': [memberOffset for _, _, memberOffset in self.members],
+                                      'itemsize': vertexSize})
+
+    @staticmethod
+    def member_format(member):
+        semantic = member.semantic
+        type = member.type
+        if semantic == BufferLayoutMember.Position:
+            if type == BufferLayoutMember.Float3:
+                return '3f'
+            raise Exception('type unrecognized for position semantic')
+        elif semantic == BufferLayoutMember.BoneWeights:
+            if type == BufferLayoutMember.Byte4C:
+                return '4b'
+            elif type == BufferLayoutMember.Short4toFloat4A:
+                return '4h'
+            raise Exception('type unrecognized for bone weight semantic')
+        elif semantic == BufferLayoutMember.BoneIndices:
+            if type in [BufferLayoutMember.Byte4B, BufferLayoutMember.Byte4E]:
+                return '4B'
+            elif type == BufferLayoutMember.ShortBoneIndices:
+                return '4H'
+            raise Exception('type unrecognized for bone indices semantic')
+        elif semantic == BufferLayoutMember.Normal:
+            if type in [BufferLayoutMember.Byte4A, BufferLayoutMember.Byte4B, BufferLayoutMember.Byte4C]:
+                return '4B'
+            elif type == BufferLayoutMember.Short4toFloat4B:
+                return '4h'
+            elif type == BufferLayoutMember.Float4:
+                return '4f'
+            raise Exception('type unrecognized for normal semantic')
+        elif semantic == BufferLayoutMember.UVSemantic:
+            if type == BufferLayoutMember.Float2:
+                return '2f'
+            elif type == BufferLayoutMember.Float3:
+                return '3f'
+            elif type in [BufferLayoutMember.Byte4A, BufferLayoutMember.Byte4B, BufferLayoutMember.Byte4C, BufferLayoutMember.Short2toFloat2, BufferLayoutMember.UVType]:
+                return '2h'
+            elif type in [BufferLayoutMember.UVPair, BufferLayoutMember.Short4toFloat4B]:
+                return '4h'
+            raise Exception('type unrecognized for UV semantic')
+        elif semantic == BufferLayoutMember.Tangent:
+            if type in [BufferLayoutMember.Byte4A, BufferLayoutMember.Byte4B, BufferLayoutMember.Byte4C]:
+                return '4B'
+            raise Exception('type unrecognized for Tangent semantic')
+        elif semantic == BufferLayoutMember.UnknownVector4A:
+            if type in [BufferLayoutMember.Byte4B, BufferLayoutMember.Byte4C]:
+                return None
+            raise Exception('type unrecognized for Sekiro Unknown vector semantic')
+        elif semantic == BufferLayoutMember.VertexColor:
+            if type in [BufferLayoutMember.Byte4A, BufferLayoutMember.Byte4C]:
+                return '4B'
+            elif type == BufferLayoutMember.Float4:
+                return '4f'
+            raise Exception('type unrecognized for color semantic')
+        return None
+
+    def decode(self, buffer, vertexCount, vertexData=None, validator=None, offset=0):
+        """
+        Decode `vertexCount` vertices of `buffer` into `vertexData`. The reserved values are checked with
+        `validator`, `offset` being the file offset of the buffer the discrepancies are reported at.
+        """
+        if vertexData is None:
+            vertexData = VertexData(vertexCount)
+        buffer = memoryview(buffer)[:vertexCount * self.vertexSize]
+        if len(buffer) != vertexCount * self.vertexSize:
+            raise Exception('Vertex buffer too short: expected {} bytes, got {}'.format(vertexCount * self.vertexSize, len(buffer)))
+        if self.dtype is not None:
+            records = numpy.frombuffer(buffer, self.dtype, vertexCount)
+            for index, (member, codec, memberOffset) in enumerate(self.members):
+                self.decode_member_array(member, records['m{}'.format(index)], vertexData, validator,
+                                         offset + memberOffset)
+            return vertexData
+        for member, codec, memberOffset in self.members:
+            self.decode_member(member, codec.iter_unpack(buffer), vertexData, validator, offset + memberOffset)
+        return vertexData
+
+    @staticmethod
+    def to_array(typecode, values):
+        """
+        `array` of `typecode` holding the NumPy array `values` converted to that (native) type. The conversion is
+        written straight into the array, outside of the GIL.
+        """
+        result = array(typecode, [0]) * values.size
+        if values.size:
+            numpy.copyto(numpy.frombuffer(result, typecode).reshape(values.shape), values, casting='unsafe')
+        return result
+
+    def pack_array(self, name, values):
+        """
+        `pack` for a NumPy array of float64 values.
+        """
+        precision = self.precision.get(name)
+        if precision == 'float16':
+            values = numpy.clip(values, -FLOAT16_MAX, FLOAT16_MAX).astype(numpy.float16).view(numpy.uint16)
+            return self.to_array('H', values), AttributeFormat('float16')
+        elif precision == 'snorm16':
+            values = numpy.where(values > 1, 32767, numpy.where(values >= -1, numpy.rint(values * 32767), -32767))
+            return self.to_array('h', values), AttributeFormat('snorm16', (1 / 32767,), (0.0,))
+        return self.to_array('f', values), None
+
+    def keep_array(self, name, values, typecode, scale, bias):
+        """
+        `keep` for a NumPy array of the stored integers.
+        """
+        if self.precision.get(name) != 'native':
+            return None
+        return self.to_array(typecode, values), AttributeFormat('native', scale, bias)
+
+    def decode_member_array(self, member, values, vertexData, validator=None, offset=0):
+        """
+        `decode_member` for the (vertexCount, components) NumPy array of the stored `values`.
+        """
+        semantic = member.semantic
+        type = member.type
+        uvFactor = self.uvFactor
+        floats = values.astype(numpy.float64)
+        if semantic == BufferLayoutMember.Position:
+            vertexData.set('positions', self.pack_array('positions', floats))
+        elif semantic == BufferLayoutMember.BoneWeights:
+            factor = 127 if type == BufferLayoutMember.Byte4C else 32767
+            attribute = self.keep_array('boneWeights', values, 'b' if type == BufferLayoutMember.Byte4C else 'h',
+                                        (1 / factor,), (0.0,))
+            if attribute is None:
+                attribute = self.pack_array('boneWeights', floats / factor)
+            vertexData.set('boneWeights', attribute)
+        elif semantic == BufferLayoutMember.BoneIndices:
+            vertexData.boneIndices = self.to_array('H', values)
+        elif semantic == BufferLayoutMember.Normal:
+            if type == BufferLayoutMember.Float4:
+                vertexData.set('normals', self.pack_array('normals', floats))
+            else:
+                typeMaxValue = 32767 if type == BufferLayoutMember.Short4toFloat4B else 127
+                attribute = self.keep_array('normals', values,
+                                            'h' if type == BufferLayoutMember.Short4toFloat4B else 'B',
+                                            (1 / typeMaxValue,), (-1.0,))
+                if attribute is None:
+                    attribute = self.pack_array('normals', (floats - typeMaxValue) / typeMaxValue)
+                vertexData.set('normals', attribute)
+        elif semantic == BufferLayoutMember.UVSemantic:
+            native = self.precision.get('uvs') == 'native'
+            if type == BufferLayoutMember.UVPair:
+                if native:
+                    vertexData.set('uvs', self.keep_array('uvs', self.uvw(values[:, 0], values[:, 1]), 'h',
+                                                          (1 / uvFactor, 1 / uvFactor, 0.0), (0.0,)))
+                    vertexData.set('uvs', self.keep_array('uvs', self.uvw(values[:, 2], values[:, 3]), 'h',
+                                                          (1 / uvFactor, 1.0, 0.0), (0.0,)))
+                else:
+                    vertexData.set('uvs', self.pack_array('uvs', self.uvw(floats[:, 0] / uvFactor,
+                                                                          floats[:, 1] / uvFactor)))
+                    vertexData.set('uvs', self.pack_array('uvs', self.uvw(floats[:, 2] / uvFactor, floats[:, 3])))
+            elif type == BufferLayoutMember.Short4toFloat4B:
+                if validator is not None and validator.enabled:
+                    for number in numpy.flatnonzero(values[:, 3]).tolist():
+                        validator.report(ValidationIssue(offset + number * self.vertexSize + 6,
+                                                         'vertex[{}] uv field 3'.format(number), (0,),
+                                                         int(values[number, 3])))
+                if native:
+                    vertexData.set('uvs', self.keep_array('uvs', values[:, :3], 'h', (1 / uvFactor,), (0.0,)))
+                else:
+                    vertexData.set('uvs', self.pack_array('uvs', floats[:, :3] / uvFactor))
+            elif type == BufferLayoutMember.Float3:
+                vertexData.set('uvs', self.pack_array('uvs', floats / uvFactor))
+            elif native and type != BufferLayoutMember.Float2:
+                vertexData.set('uvs', self.keep_array('uvs', self.uvw(values[:, 0], values[:, 1]), 'h',
+                                                      (1 / uvFactor, 1.0, 0.0), (0.0,)))
+            else:
+                vertexData.set('uvs', self.pack_array('uvs', self.uvw(floats[:, 0] / uvFactor, floats[:, 1])))
+        elif semantic == BufferLayoutMember.Tangent:
+            attribute = self.keep_array('tangents', values, 'B', (1.0,), (-1.0,))
+            if attribute is None:
+                attribute = self.pack_array('tangents', floats - 127 / 127)
+            vertexData.set('tangents', attribute)
+        elif semantic == BufferLayoutMember.VertexColor:
+            if type == BufferLayoutMember.Float4:
+                vertexData.set('colors', self.pack_array('colors', floats))
+            else:
+                attribute = self.keep_array('colors', values, 'B', (1 / 255,), (0.0,))
+                if attribute is None:
+                    attribute = self.pack_array('colors', floats / 255)
+                vertexData.set('colors', attribute)
+
+    @staticmethod
+    def uvw(u, v):
+        """
+        (vertexCount, 3) NumPy array of the `u` and `v` columns and a zero w.
+        """
+        result = numpy.zeros((len(u), 3), dtype=numpy.result_type(u, v))
+        result[:, 0] = u
+        result[:, 1] = v
+        return result
+
+    def pack(self, name, values):
+        """
+        The float `values` of the semantic `name` converted to the precision set for it as they are stored.
+
+        Returns:
+            The attribute array and its `AttributeFormat`, None for float32.
+        """
+        precision = self.precision.get(name)
+        if precision == 'float16':
+            values = [min(max(v, -FLOAT16_MAX), FLOAT16_MAX) for v in values]
+            packed = array('H')
+            packed.frombytes(struct.pack('={}e'.format(len(values)), *values))
+            return packed, AttributeFormat('float16')
+        elif precision == 'snorm16':
+            return array('h', [round(v * 32767) if -1 <= v <= 1 else (32767 if v > 0 else -32767) for v in values]), \
+                AttributeFormat('snorm16', (1 / 32767,), (0.0,))
+        return array('f', values), None
+
+    def keep(self, name, values, typecode, scale, bias):
+        """
+        The stored integer `values` of the semantic `name` when it is kept native, None otherwise.
+        """
+        if self.precision.get(name) != 'native':
+            return None
+        return array(typecode, values), AttributeFormat('native', scale, bias)
+
+    def decode_member(self, member, values, vertexData, validator=None, offset=0):
+        semantic = member.semantic
+        type = member.type
+        uvFactor = self.uvFactor
+        if semantic == BufferLayoutMember.Position:
+            vertexData.set('positions', self.pack('positions', chain.from_iterable(values)))
+        elif semantic == BufferLayoutMember.BoneWeights:
+            factor = 127 if type == BufferLayoutMember.Byte4C else 32767
+            attribute = self.keep('boneWeights', chain.from_iterable(values),
+                                  'b' if type == BufferLayoutMember.Byte4C else 'h', (1 / factor,), (0.0,))
+            if attribute is None:
+                attribute = self.pack('boneWeights', [v / factor for v in chain.from_iterable(values)])
+            vertexData.set('boneWeights', attribute)
+        elif semantic == BufferLayoutMember.BoneIndices:
+            vertexData.boneIndices = array('H', chain.from_iterable(values))
+        elif semantic == BufferLayoutMember.Normal:
+            if type == BufferLayoutMember.Float4:
+                vertexData.set('normals', self.pack('normals', chain.from_iterable(values)))
+            else:
+                typeMaxValue = 32767 if type == BufferLayoutMember.Short4toFloat4B else 127
+                attribute = self.keep('normals', chain.from_iterable(values),
+                                      'h' if type == BufferLayoutMember.Short4toFloat4B else 'B',
+                                      (1 / typeMaxValue,), (-1.0,))
+                if attribute is None:
+                    attribute = self.pack('normals', [(v - typeMaxValue) / typeMaxValue
+                                                      for v in chain.from_iterable(values)])
+                vertexData.set('normals', attribute)
+        elif semantic == BufferLayoutMember.UVSemantic:
+            native = self.precision.get('uvs') == 'native'
+            if type == BufferLayoutMember.UVPair:
+                values = list(values)
+                if native:
+                    vertexData.set('uvs', self.keep('uvs', [c for u, v, _, _ in values for c in (u, v, 0)], 'h',
+                                                    (1 / uvFactor, 1 / uvFactor, 0.0), (0.0,)))
+                    vertexData.set('uvs', self.keep('uvs', [c for _, _, u, v in values for c in (u, v, 0)], 'h',
+                                                    (1 / uvFactor, 1.0, 0.0), (0.0,)))
+                else:
+                    vertexData.set('uvs', self.pack('uvs', [c for u, v, _, _ in values
+                                                            for c in (u / uvFactor, v / uvFactor, 0)]))
+                    vertexData.set('uvs', self.pack('uvs', [c for _, _, u, v in values for c in (u / uvFactor, v, 0)]))
+            elif type == BufferLayoutMember.Short4toFloat4B:
+                values = list(values)
+                if validator is not None and validator.enabled:
+                    for number, value in enumerate(values):
+                        if value[3] != 0:
+                            validator.report(ValidationIssue(offset + number * self.vertexSize + 6,
+                                                             'vertex[{}] uv field 3'.format(number), (0,), value[3]))
+                if native:
+                    vertexData.set('uvs', self.keep('uvs', [c for value in values for c in value[:3]], 'h',
+                                                    (1 / uvFactor,), (0.0,)))
+                else:
+                    vertexData.set('uvs', self.pack('uvs', [c / uvFactor for value in values for c in value[:3]]))
+            elif type == BufferLayoutMember.Float3:
+                vertexData.set('uvs', self.pack('uvs', [c / uvFactor for c in chain.from_iterable(values)]))
+            elif native and type != BufferLayoutMember.Float2:
+                vertexData.set('uvs', self.keep('uvs', [c for u, v in values for c in (u, v, 0)], 'h',
+                                                (1 / uvFactor, 1.0, 0.0), (0.0,)))
+            else:
+                vertexData.set('uvs', self.pack('uvs', [c for u, v in values for c in (u / uvFactor, v, 0)]))
+        elif semantic == BufferLayoutMember.Tangent:
+            attribute = self.keep('tangents', chain.from_iterable(values), 'B', (1.0,), (-1.0,))
+            if attribute is None:
+                attribute = self.pack('tangents', [(v - 127 / 127) for v in chain.from_iterable(values)])
+            vertexData.set('tangents', attribute)
+        elif semantic == BufferLayoutMember.VertexColor:
+            if type == BufferLayoutMember.Float4:
+                vertexData.set('colors', self.pack('colors', chain.from_iterable(values)))
+            else:
+                attribute = self.keep('colors', chain.from_iterable(values), 'B', (1 / 255,), (0.0,))
+                if attribute is None:
+                    attribute = self.pack('colors', [v / 255 for v in chain.from_iterable(values)])
+                vertexData.set('colors', attribute)
+
+
+# largest finite half precision float
+FLOAT16_MAX = 65504.0
+
+
+class AttributeFormat:
+    """
+    How a vertex attribute array is stored when it is not float32, as asked per semantic with a precision:
+
+    - 'float32': array('f') of the decoded values, the default.
+    - 'float16': array('H') holding the bits of the half precision values, clamped to +-65504. Asking it for every
+      semantic leaves the positions in float32, their range rarely fits.
+    - 'snorm16': array('h') of the values clamped to [-1, 1] and scaled by 32767, for normals, bone weights and
+      colors.
+    - 'native': the integers as stored in the file, value = stored * scale + bias for each component. Attributes
+      stored as floats stay float32.
+
+    `scale` and `bias` hold one value per component, or a single one for all of them.
+    """
+    __slots__ = ('precision', 'scale', 'bias')
+
+    precisions = ('float32', 'float16', 'snorm16', 'native')
+    semantics = ('positions', 'normals', 'boneWeights', 'uvs', 'tangents', 'colors')
+    snormSemantics = ('normals', 'boneWeights', 'colors')
+    float16Semantics = ('normals', 'boneWeights', 'uvs', 'tangents', 'colors')
+
+    def __init__(self, precision, scale=None, bias=None):
+        self.precision = precision
+        self.scale = scale
+        self.bias = bias
+
+    @classmethod
+    def normalize(cls, precision):
+        """
+        Hashable form of `precision`: a precision for every semantic accepting it, or a dict (or pairs) of semantic
+        names to precisions.
+
+        Returns:
+            tuple: the sorted (semantic, precision) pairs, float32 ones left out.
+        """
+        if not precision:
+            return ()
+        if isinstance(precision, str):
+            semantics = {'snorm16': cls.snormSemantics, 'float16': cls.float16Semantics}.get(precision, cls.semantics)
+            precision = {semantic: precision for semantic in semantics}
+        precision = dict(precision)
+        for semantic, value in precision.items():
+            if semantic not in cls.semantics:
+                raise Exception('Unknown semantic {}, expected one of {}'.format(semantic, ', '.join(cls.semantics)))
+            if value not in cls.precisions:
+                raise Exception('Unknown precision {}, expected one of {}'.format(value, ', '.join(cls.precisions)))
+            if value == 'snorm16' and semantic not in cls.snormSemantics:
+                raise Exception('{} cannot be stored as snorm16, only {} can'.format(
+                    semantic, ', '.join(cls.snormSemantics)))
+        return tuple(sorted((semantic, value) for semantic, value in precision.items() if value != 'float32'))
+
+    def decode(self, values):
+        """
+        The float values of the stored `values`, a whole attribute array or the components of one vertex.
+        """
+        if self.precision == 'float16':
+            return array('f', struct.unpack('={}e'.format(len(values)), memoryview(values).tobytes()))
+        scale = self.scale
+        bias = self.bias
+        if len(scale) == 1 and len(bias) == 1:
+            scale = scale[0]
+            bias = bias[0]
+            return array('f', [v * scale + bias for v in values])
+        count = max(len(scale), len(bias))
+        scale = scale * (count // len(scale))
+        bias = bias * (count // len(bias))
+        return array('f', [v * scale[i % count] + bias[i % count] for i, v in enumerate(values)])
+
+    def to_list(self):
+        return [self.precision, self.scale, self.bias]
+
+    @classmethod
+    def from_list(cls, values):
+        precision, scale, bias = values
+        return cls(precision, tuple(scale) if scale is not None else None, tuple(bias) if bias is not None else None)
+
+
+class VertexData:
+    """
+    Attributes of all the vertices of a mesh, stored as flat arrays with a fixed number of components per vertex:
+    positions (x, y, z), normals (x, y, z, w), bone weights and bone indices (4 each), one array of (u, v, w) per
+    UV channel, one array of (x, y, z, w) per tangent and one array of (a, r, g, b) per vertex color.
+
+    Arrays decoded in another precision than float32 have their `AttributeFormat` in `formats`, keyed by the
+    attribute name, or by (name, channel) for the list attributes.
+    """
+    __slots__ = ('vertexCount', 'positions', 'normals', 'boneWeights', 'boneIndices', 'uvs', 'tangents', 'colors',
+                 'formats')
+
+    def __init__(self, vertexCount):
+        self.vertexCount = vertexCount
+        self.positions = None
+        self.normals = None
+        self.boneWeights = None
+        self.boneIndices = None
+        self.uvs = []
+        self.tangents = []
+        self.colors = []
+        self.formats = {}
+
+    def __len__(self):
+        return self.vertexCount
+
+    def set(self, name, attribute):
+        """
+        Store the (values, format) `attribute` as `name`, appended as a new channel for the list attributes.
+        """
+        values, format = attribute
+        if isinstance(getattr(self, name), list):
+            key = (name, len(getattr(self, name)))
+            getattr(self, name).append(values)
+        else:
+            key = name
+            setattr(self, name, values)
+        if format is not None:
+            self.formats[key] = format
+        else:
+            self.formats.pop(key, None)
+
+    def decoded(self, name, channel=None):
+        """
+        The attribute `name` (its `channel` for the list attributes) as floats, whatever precision it is stored in.
+        """
+        values = getattr(self, name) if channel is None else getattr(self, name)[channel]
+        format = self.formats.get(name if channel is None else (name, channel))
+        if values is None or format is None:
+            return values
+        return format.decode(values)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.vertexCount
+        if not 0 <= index < self.vertexCount:
+            raise IndexError('vertex index out of range')
+        return VertexView(self, index)
+
+    def __iter__(self):
+        for index in range(self.vertexCount):
+            yield VertexView(self, index)
+
+
+class VertexView:
+    """
+    Per-vertex access to a `VertexData`, building the `Vector3`/`Vector4`/`Color` objects on demand from the
+    underlying arrays.
+    """
+    __slots__ = ('vertexData', 'index')
+
+    def __init__(self, vertexData, index):
+        self.vertexData = vertexData
+        self.index = index
+
+    def components(self, key, values, count):
+        values = values[self.index * count:self.index * count + count]
+        format = self.vertexData.formats.get(key)
+        return values if format is None else format.decode(values)
+
+    @property
+    def position(self):
+        positions = self.vertexData.positions
+        return Vector3(*self.components('positions', positions, 3)) if positions is not None else None
+
+    @property
+    def normal(self):
+        normals = self.vertexData.normals
+        return Vector4(*self.components('normals', normals, 4)) if normals is not None else None
+
+    @property
+    def boneWeights(self):
+        boneWeights = self.vertexData.boneWeights
+        return tuple(self.components('boneWeights', boneWeights, 4)) if boneWeights is not None else None
+
+    @property
+    def boneIndices(self):
+        boneIndices = self.vertexData.boneIndices
+        return tuple(boneIndices[self.index * 4:self.index * 4 + 4]) if boneIndices is not None else None
+
+    @property
+    def uvs(self):
+        return [Vector3(*self.components(('uvs', channel), uvs, 3))
+                for channel, uvs in enumerate(self.vertexData.uvs)]
+
+    @property
+    def tangents(self):
+        return [Vector4(*self.components(('tangents', channel), tangents, 4))
+                for channel, tangents in enumerate(self.vertexData.tangents)]
+
+    @property
+    def colors(self):
+        return [Color(*self.components(('colors', channel), colors, 4))
+                for channel, colors in enumerate(self.vertexData.colors)]
+
+
 class Mesh:
+    __slots__ = (
+        'dynamic', 'materialIndex', 'defaultBoneIndex', 'boneCount', 'unk1', 'boundingBoxOffset', 'boundingBoxMin',
+        'boundingBoxMax', 'boundingBoxUnk', 'faceSets', 'vertexBuffers', 'vertices', 'material', 'loader',
+        '_vertexData', 'boneOffset', 'boneIndices', 'faceSetCount', 'faceSetOffset', 'faceSetIndices',
+        'vertexBufferCount', 'vertexBufferOffset', 'vertexBufferIndices'
+    )
+
     def __init__(self):
         self.dynamic = False
         self.materialIndex = 0
@@ -608,6 +1721,9 @@ class Mesh:
         self.faceSets = []
         self.vertexBuffers = []
         self.vertices = []
+        self.material = None
+        self.loader = None
+        self._vertexData = None
         self.boneOffset = 0
         self.boneIndices = []
         self.faceSetCount = 0
@@ -617,6 +1733,19 @@ class Mesh:
         self.vertexBufferOffset = 0
         self.vertexBufferIndices = []
 
+    @property
+    def vertexData(self):
+        """
+        Decoded vertex attributes, loaded from `loader` the first time they are accessed.
+        """
+        if self._vertexData is None and self.loader is not None:
+            self._vertexData = self.loader.load_vertices(self)
+        return self._vertexData
+
+    @vertexData.setter
+    def vertexData(self, vertexData):
+        self._vertexData = vertexData
+
     def take_face_sets(self, faceSetsDict):
         for i in self.faceSetIndices:
             self.faceSets.append(faceSetsDict[i])
@@ -627,6 +1756,16 @@ class Mesh:
 
 
 class FaceSet:
+    __slots__ = (
+        'flags', 'triangleStrip', 'cullBackfaces', 'unk06', 'unk07', 'vertexCount', 'vertexOffset', 'vertexSize',
+        'indexSize', 'loader', '_vertices'
+    )
+
+    LodLevel1 = 0x01000000
+    LodLevel2 = 0x02000000
+    EdgeCompressed = 0x40000000
+    MotionBlur = 0x80000000
+
     def __init__(self):
         self.flags = 0;
         self.triangleStrip = False;
@@ -637,4 +1776,40 @@ class FaceSet:
         self.vertexOffset = 0;
         self.vertexSize = 0;
         self.indexSize = 0
-        self.vertices = 0
+        self.loader = None
+        self._vertices = None
+
+    @property
+    def vertices(self):
+        """
+        Index buffer, loaded from `loader` the first time it is accessed.
+        """
+        if self._vertices is None and self.loader is not None:
+            self._vertices = self.loader.load_indices(self)
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, vertices):
+        self._vertices = vertices
+
+    @property
+    def lod(self):
+        """
+        Level of detail of the face set from its flags, 0 for the full detail one.
+        """
+        if self.flags & self.LodLevel2:
+            return 2
+        if self.flags & self.LodLevel1:
+            return 1
+        return 0
+
+    def matches(self, lods=None, motionBlur=None, mask=0, flags=0):
+        """
+        Whether the face set is of one of the `lods` levels, is (True) or is not (False) a motion blur face set
+        when `motionBlur` is given, and has the `flags` bits set among the `mask` ones.
+        """
+        if lods is not None and self.lod not in lods:
+            return False
+        if motionBlur is not None and bool(self.flags & self.MotionBlur) != motionBlur:
+            return False
+        return self.flags & mask == flags
@@ -0,0 +1,219 @@
+import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Skeleton:
+    """
+    Bones of a model stored as parallel arrays: names, parent indices and the bind pose translation, euler rotation
+    (radians) and scale of every bone, 3 floats each. `levels` groups the bone indices by depth, parents always
+    coming before their children whatever the order of the bone table.
+
+    When NumPy is installed the matrices are computed in batches: the local matrices of all the bones at once, and
+    the world matrices one level at a time as a stacked (n, 4, 4) product with the world matrices of the parents.
+    Without it, the same results come from plain loops over the bones, level after level.
+
+    Matrices are 4x4, row-major and for column vectors, 16 doubles per bone in one flat array. A local bind matrix
+    is T * Ry * Rz * Rx * S.
+    """
+    def __init__(self, names, parentIndices, translations, rotations, scales):
+        self.names = list(names)
+        self.parentIndices = array('i', parentIndices)
+        self.translations = array('f', translations)
+        self.rotations = array('f', rotations)
+        self.scales = array('f', scales)
+        self.levels = self.sort_levels(self.parentIndices)
+
+    @classmethod
+    def from_bones(cls, bones):
+        return cls([bone.name for bone in bones],
+                   [bone.parentIndex for bone in bones],
+                   [value for bone in bones for value in (bone.translation.x, bone.translation.y, bone.translation.z)],
+                   [value for bone in bones for value in (bone.rotation.x, bone.rotation.y, bone.rotation.z)],
+                   [value for bone in bones for value in (bone.scale.x, bone.scale.y, bone.scale.z)])
+
+    def __len__(self):
+        return len(self.parentIndices)
+
+    @staticmethod
+    def sort_levels(parentIndices):
+        """
+        Bone indices grouped by depth in the hierarchy, roots first. Parent indices outside the skeleton make a
+        bone a root.
+        """
+        count = len(parentIndices)
+        depths = array('i', [-1]) * count
+        levels = []
+        for bone in range(count):
+            chain = []
+            current = bone
+            while 0 <= current < count and depths[current] < 0:
+                if len(chain) > count:
+                    raise Exception('Bone hierarchy has a cycle through bone {}'.format(bone))
+                chain.append(current)
+                current = parentIndices[current]
+            depth = depths[current] if 0 <= current < count else -1
+            for index in reversed(chain):
+                depth += 1
+                depths[index] = depth
+                if depth == len(levels):
+                    levels.append(array('i'))
+                levels[depth].append(index)
+        for level in levels:
+            level[:] = array('i', sorted(level))
+        return levels
+
+    def local_matrices(self):
+        """
+        Local bind matrices of every bone, relative to their parent, computed in a single pass over the TRS arrays.
+        """
+        if numpy is not None:
+            return self.flatten(self.batched_local_matrices())
+        t = self.translations
+        r = self.rotations
+        s = self.scales
+        matrices = array('d')
+        for i in range(0, len(t), 3):
+            cx, sx = math.cos(r[i]), math.sin(r[i])
+            cy, sy = math.cos(r[i + 1]), math.sin(r[i + 1])
+            cz, sz = math.cos(r[i + 2]), math.sin(r[i + 2])
+            scaleX, scaleY, scaleZ = s[i], s[i + 1], s[i + 2]
+            matrices.extend((
+                cy * cz * scaleX, (sy * sx - cy * sz * cx) * scaleY, (cy * sz * sx + sy * cx) * scaleZ, t[i],
+                sz * scaleX, cz * cx * scaleY, -cz * sx * scaleZ, t[i + 1],
+                -sy * cz * scaleX, (sy * sz * cx + cy * sx) * scaleY, (cy * cx - sy * sz * sx) * scaleZ, t[i + 2],
+                0.0, 0.0, 0.0, 1.0,
+            ))
+        return matrices
+
+    def world_matrices(self, localMatrices=None):
+        """
+        World bind matrices of every bone: the local matrices composed with the world matrix of their parent,
+        one level of the hierarchy after the other.
+        """
+        if numpy is not None:
+            return self.flatten(self.batched_world_matrices(localMatrices))
+        world = array('d', localMatrices if localMatrices is not None else self.local_matrices())
+        parents = self.parentIndices
+        for level in self.levels[1:]:
+            for bone in level:
+                p = parents[bone] * 16
+                b = bone * 16
+                a00, a01, a02, a03, a10, a11, a12, a13, a20, a21, a22, a23 = world[p:p + 12]
+                b00, b01, b02, b03, b10, b11, b12, b13, b20, b21, b22, b23 = world[b:b + 12]
+                world[b:b + 12] = array('d', (
+                    a00 * b00 + a01 * b10 + a02 * b20, a00 * b01 + a01 * b11 + a02 * b21,
+                    a00 * b02 + a01 * b12 + a02 * b22, a00 * b03 + a01 * b13 + a02 * b23 + a03,
+                    a10 * b00 + a11 * b10 + a12 * b20, a10 * b01 + a11 * b11 + a12 * b21,
+                    a10 * b02 + a11 * b12 + a12 * b22, a10 * b03 + a11 * b13 + a12 * b23 + a13,
+                    a20 * b00 + a21 * b10 + a22 * b20, a20 * b01 + a21 * b11 + a22 * b21,
+                    a20 * b02 + a21 * b12 + a22 * b22, a20 * b03 + a21 * b13 + a22 * b23 + a23,
+                ))
+        return world
+
+    def inverse_bind_matrices(self, worldMatrices=None):
+        """
+        Inverses of the world bind matrices, as used for skinning.
+        """
+        if numpy is not None:
+            return self.flatten(self.batched_inverse_bind_matrices(worldMatrices))
+        world = worldMatrices if worldMatrices is not None else self.world_matrices()
+        inverses = array('d')
+        for b in range(0, len(world), 16):
+            m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23 = world[b:b + 12]
+            c00 = m11 * m22 - m12 * m21
+            c01 = m02 * m21 - m01 * m22
+            c02 = m01 * m12 - m02 * m11
+            c10 = m12 * m20 - m10 * m22
+            c11 = m00 * m22 - m02 * m20
+            c12 = m02 * m10 - m00 * m12
+            c20 = m10 * m21 - m11 * m20
+            c21 = m01 * m20 - m00 * m21
+            c22 = m00 * m11 - m01 * m10
+            determinant = m00 * c00 + m01 * c10 + m02 * c20
+            if determinant == 0:
+                raise Exception('Bind matrix of bone {} is not invertible'.format(b // 16))
+            f = 1.0 / determinant
+            c00, c01, c02 = c00 * f, c01 * f, c02 * f
+            c10, c11, c12 = c10 * f, c11 * f, c12 * f
+            c20, c21, c22 = c20 * f, c21 * f, c22 * f
+            inverses.extend((
+                c00, c01, c02, -(c00 * m03 + c01 * m13 + c02 * m23),
+                c10, c11, c12, -(c10 * m03 + c11 * m13 + c12 * m23),
+                c20, c21, c22, -(c20 * m03 + c21 * m13 + c22 * m23),
+                0.0, 0.0, 0.0, 1.0,
+            ))
+        return inverses
+
+    def matrix(self, matrices, bone):
+        """
+        The 16 values of the matrix of `bone` in `matrices`.
+        """
+        return tuple(matrices[bone * 16:bone * 16 + 16])
+
+    @staticmethod
+    def flatten(matrices):
+        result = array('d')
+        result.frombytes(numpy.ascontiguousarray(matrices, dtype=numpy.float64).tobytes())
+        return result
+
+    @staticmethod
+    def stack(matrices):
+        return numpy.array(matrices, dtype=numpy.float64).reshape(-1, 4, 4)
+
+    def batched_local_matrices(self):
+        """
+        Local bind matrices of every bone as one (n, 4, 4) NumPy array, each entry computed for all bones at once.
+        """
+        t = numpy.array(self.translations, dtype=numpy.float64).reshape(-1, 3)
+        r = numpy.array(self.rotations, dtype=numpy.float64).reshape(-1, 3)
+        s = numpy.array(self.scales, dtype=numpy.float64).reshape(-1, 3)
+        cx, cy, cz = numpy.cos(r).T
+        sx, sy, sz = numpy.sin(r).T
+        scaleX, scaleY, scaleZ = s.T
+        matrices = numpy.zeros((len(t), 4, 4))
+        matrices[:, 0, 0] = cy * cz * scaleX
+        matrices[:, 0, 1] = (sy * sx - cy * sz * cx) * scaleY
+        matrices[:, 0, 2] = (cy * sz * sx + sy * cx) * scaleZ
+        matrices[:, 1, 0] = sz * scaleX
+        matrices[:, 1, 1] = cz * cx * scaleY
+        matrices[:, 1, 2] = -cz * sx * scaleZ
+        matrices[:, 2, 0] = -sy * cz * scaleX
+        matrices[:, 2, 1] = (sy * sz * cx + cy * sx) * scaleY
+        matrices[:, 2, 2] = (cy * cx - sy * sz * sx) * scaleZ
+        matrices[:, 0:3, 3] = t
+        matrices[:, 3, 3] = 1.0
+        return matrices
+
+    def batched_world_matrices(self, localMatrices=None):
+        """
+        World bind matrices as one (n, 4, 4) NumPy array, every level of the hierarchy multiplied by the world
+        matrices of its parents in a single stacked product.
+        """
+        if localMatrices is None:
+            world = self.batched_local_matrices()
+        else:
+            world = self.stack(localMatrices)
+        parents = numpy.array(self.parentIndices, dtype=numpy.intp)
+        for level in self.levels[1:]:
+            bones = numpy.array(level, dtype=numpy.intp)
+            world[bones] = world[parents[bones]] @ world[bones]
+        return world
+
+    def batched_inverse_bind_matrices(self, worldMatrices=None):
+        """
+        Inverses of the world bind matrices as one (n, 4, 4) NumPy array, inverted in a single batch.
+        """
+        if worldMatrices is None:
+            world = self.batched_world_matrices()
+        else:
+            world = self.stack(worldMatrices)
+        determinants = numpy.linalg.det(world[:, 0:3, 0:3])
+        singular = numpy.flatnonzero(determinants == 0)
+        if len(singular):
+            raise Exception('Bind matrix of bone {} is not invertible'.format(singular[0]))
+        return numpy.linalg.inv(world)
@@ -0,0 +1,152 @@
+import struct
+from array import array
+
+from reader import FLOAT16_MAX, VertexDecoder
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INDEX_TYPES = {'uint8': 'B', 'uint16': 'H'}
+WEIGHT_TYPES = ('float16', 'float32')
+
+
+class SkinData:
+    """
+    Skinning attributes of a mesh, 4 influences per vertex: bone indices into the model's bone table and their
+    weights. `boneWeights` is an array('f') for float32 and the native-endian packed bytes for float16, which
+    `array` cannot hold.
+    """
+    def __init__(self, vertexCount, boneIndices, boneWeights, indexType, weightType):
+        self.vertexCount = vertexCount
+        self.boneIndices = boneIndices
+        self.boneWeights = boneWeights
+        self.indexType = indexType
+        self.weightType = weightType
+
+
+def global_bone_indices(mesh, weights=None):
+    """
+    The vertex bone indices of `mesh` resolved against `mesh.boneIndices`, with one gather over the whole array.
+    Meshes without a bone list already reference the model's bone table directly. Indices outside of the bone list
+    are only allowed on influences whose entry in `weights` is zero, they are resolved to bone 0.
+    """
+    if numpy is not None:
+        return batched_global_bone_indices(mesh, weights).tolist()
+    local = mesh.vertexData.boneIndices
+    palette = mesh.boneIndices
+    if not len(palette):
+        return list(local)
+    count = len(palette)
+    indices = [palette[index] if index < count else -1 for index in local]
+    if -1 in indices:
+        for position, index in enumerate(indices):
+            if index == -1:
+                if weights is None or weights[position]:
+                    raise Exception('Vertex bone index {} out of range of the {} mesh bones'.format(
+                        local[position], count))
+                indices[position] = 0
+    return indices
+
+
+def normalize_weights(weights, threshold=0.0):
+    """
+    Weights of 4 influences per vertex scaled to sum to 1, after zeroing the negative ones and those below
+    `threshold`. Vertices whose weights are all zero are left as they are.
+    """
+    if numpy is not None:
+        return batched_normalize_weights(weights, threshold).tolist()
+    weights = [weight if weight > 0 and weight >= threshold else 0.0 for weight in weights]
+    totals = [w0 + w1 + w2 + w3 for w0, w1, w2, w3 in zip(weights[0::4], weights[1::4], weights[2::4], weights[3::4])]
+    scales = [1.0 / total if total > 0 else 1.0 for total in totals]
+    return [weight * scales[index >> 2] for index, weight in enumerate(weights)]
+
+
+def batched_global_bone_indices(mesh, weights=None):
+    """
+    `global_bone_indices` as a NumPy array, gathered with one `take` through the bone list.
+    """
+    local = numpy.asarray(mesh.vertexData.boneIndices).astype(numpy.intp)
+    palette = numpy.asarray(mesh.boneIndices).astype(numpy.intp)
+    if not len(palette):
+        return local
+    outside = local >= len(palette)
+    if not outside.any():
+        return palette.take(local)
+    invalid = numpy.flatnonzero(outside if weights is None else outside & (numpy.asarray(weights) != 0))
+    if len(invalid):
+        raise Exception('Vertex bone index {} out of range of the {} mesh bones'.format(
+            local[invalid[0]], len(palette)))
+    indices = palette.take(numpy.where(outside, 0, local))
+    indices[outside] = 0
+    return indices
+
+
+def batched_normalize_weights(weights, threshold=0.0):
+    """
+    `normalize_weights` as a flat NumPy array, the totals summed over the (vertexCount, 4) view of the weights.
+    """
+    weights = numpy.array(weights, dtype=numpy.float64).reshape(-1, 4)
+    weights = numpy.where((weights > 0) & (weights >= threshold), weights, 0.0)
+    totals = weights.sum(axis=1, keepdims=True)
+    scales = numpy.divide(1.0, totals, out=numpy.ones_like(totals), where=totals > 0)
+    return (weights * scales).reshape(-1)
+
+
+def build_skin(mesh, threshold=0.0, indexType=None, weightType='float32'):
+    """
+    Global bone indices and normalized weights of `mesh`.
+
+    Args:
+        mesh: a mesh with decoded vertex data holding bone indices and weights.
+        threshold: weights below it are pruned (zeroed, their index set to 0) before normalizing.
+        indexType: 'uint8' or 'uint16', or None for the smallest one holding the indices.
+        weightType: 'float16' or 'float32'.
+
+    Returns:
+        SkinData: the skin, or None when the mesh has no bone indices or weights.
+    """
+    vertexData = mesh.vertexData
+    if vertexData.boneIndices is None or vertexData.boneWeights is None:
+        return None
+    if weightType not in WEIGHT_TYPES:
+        raise Exception('Unknown weight type {}, expected one of {}'.format(weightType, ', '.join(WEIGHT_TYPES)))
+
+    if numpy is not None:
+        weights = batched_normalize_weights(vertexData.decoded('boneWeights'), threshold)
+        indices = batched_global_bone_indices(mesh, weights)
+        if threshold > 0:
+            indices = numpy.where(weights != 0, indices, 0)
+        largest = int(indices.max()) if len(indices) else 0
+    else:
+        weights = normalize_weights(vertexData.decoded('boneWeights'), threshold)
+        indices = global_bone_indices(mesh, weights)
+        if threshold > 0:
+            indices = [index if weight else 0 for index, weight in zip(indices, weights)]
+        largest = max(indices, default=0)
+    if indexType is None:
+        indexType = 'uint8' if largest < 256 else 'uint16'
+    if indexType not in INDEX_TYPES:
+        raise Exception('Unknown index type {}, expected one of {}'.format(indexType, ', '.join(INDEX_TYPES)))
+    if largest >= 1 << (8 * array(INDEX_TYPES[indexType]).itemsize):
+        raise Exception('Bone index {} does not fit in {}'.format(largest, indexType))
+
+    if numpy is not None:
+        boneIndices = VertexDecoder.to_array(INDEX_TYPES[indexType], indices)
+        if weightType == 'float16':
+            boneWeights = numpy.clip(weights, -FLOAT16_MAX, FLOAT16_MAX).astype(numpy.float16).tobytes()
+        else:
+            boneWeights = VertexDecoder.to_array('f', weights)
+    else:
+        boneIndices = array(INDEX_TYPES[indexType], indices)
+        if weightType == 'float16':
+            weights = [min(max(weight, -FLOAT16_MAX), FLOAT16_MAX) for weight in weights]
+            boneWeights = struct.pack('={}e'.format(len(weights)), *weights)
+        else:
+            boneWeights = array('f', weights)
+    return SkinData(vertexData.vertexCount, boneIndices, boneWeights, indexType, weightType)
+
+
+def build_skins(meshes, threshold=0.0, indexType=None, weightType='float32'):
+    return [build_skin(mesh, threshold, indexType, weightType) for mesh in meshes]
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from asyncImporter import LatencyFetcher, import_models
+from test_bnd4 import direct_contents, model_contents
+from writer import FlverSpec, write_flver
+
+
+class TruncatingFetcher(LatencyFetcher):
+    """
+    Fetcher whose file shrinks to `size` bytes once the first chunk is read, as if it was rewritten meanwhile.
+    """
+    def __init__(self, size):
+        super().__init__(latency=0.001, chunkSize=4096)
+        self.size = size
+
+    async def read_chunk(self, stream, view):
+        os.truncate(stream.name, self.size)
+        return await super().read_chunk(stream, view)
+
+
+class ImportModelsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = {}
+        for seed in range(6):
+            path = os.path.join(self.directory.name, 'c{}.flver'.format(seed))
+            data = write_flver(FlverSpec('big' if seed % 2 else 'little', vertexCount=300, indexCount=600,
+                                         meshCount=1 + seed % 3, seed=seed))
+            with open(path, 'wb') as stream:
+                stream.write(data)
+            self.files[path] = data
+        self.bad = os.path.join(self.directory.name, 'bad.flver')
+        with open(self.bad, 'wb') as stream:
+            stream.write(b'FLVER\x00' + bytes(58))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def collect(self, paths, fetcher, limit=3):
+        async def run():
+            results = {}
+            async for path, model, error in import_models(paths, limit, fetcher, load=True):
+                results[path] = (model_contents(model) if model is not None else None, error)
+            return results
+        return asyncio.run(run())
+
+    def test_latency_fetcher(self):
+        paths = list(self.files) + [self.bad, os.path.join(self.directory.name, 'missing.flver')]
+        results = self.collect(paths, LatencyFetcher(latency=0.001, chunkSize=4096))
+        self.assertEqual(sorted(results), sorted(paths))
+        for path, data in self.files.items():
+            contents, error = results[path]
+            self.assertIsNone(error)
+            self.assertEqual(contents, direct_contents(data))
+        for path in paths[-2:]:
+            contents, error = results[path]
+            self.assertIsNone(contents)
+            self.assertIsInstance(error, Exception)
+
+    def test_short_read(self):
+        path = next(iter(self.files))
+        contents, error = self.collect([path], TruncatingFetcher(100))[path]
+        self.assertIsNone(contents)
+        self.assertNotIsInstance(error, BufferError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from bnd4 import Bnd4Archive
+from model import FlverModel
+from writer import FlverSpec, write_bnd4, write_dcx, write_flver
+
+FORMATS = (0x2E, 0x74, 0x54, 0x26, 0x12)
+
+
+def flver_members(unicode):
+    """
+    (id, name, data) members of a synthetic archive: FLVERs of both endiannesses, a DCX compressed one and a
+    member which is not a FLVER.
+    """
+    prefix = 'N:\\FDP\\data\\Model\\chr\\c1000\\' if unicode else 'N:\\FDP\\data\\Model\\chr\\キャラ\\'
+    little = write_flver(FlverSpec(vertexCount=200, indexCount=600, meshCount=2, boneCount=3, seed=1))
+    big = write_flver(FlverSpec(endianness='big', vertexCount=150, indexCount=300, boneCount=2, seed=2))
+    compressed = write_dcx(write_flver(FlverSpec(vertexCount=100, indexCount=300, indexSize=32, seed=3)))
+    return [
+        (200, prefix + 'c1000.flver', little),
+        (201, prefix + 'c1000_1.flver', big),
+        (202, prefix + 'c1000_2.flver.dcx', compressed),
+        (300, prefix + 'c1000.tpf', b'TPF\x00' + bytes(60)),
+    ]
+
+
+def model_contents(model):
+    meshes = []
+    for mesh in model.meshes:
+        vertexData = mesh.vertexData
+        meshes.append((
+            list(vertexData.positions), list(vertexData.normals), list(vertexData.boneWeights),
+            list(vertexData.boneIndices), [list(uvs) for uvs in vertexData.uvs],
+            [list(tangents) for tangents in vertexData.tangents], [list(colors) for colors in vertexData.colors],
+            [(faceSet.flags, list(faceSet.vertices)) for faceSet in mesh.faceSets],
+        ))
+    return (model.version, [bone.name for bone in model.bones], [material.name for material in model.materials],
+            meshes)
+
+
+def direct_contents(data):
+    with FlverModel(data) as model:
+        return model_contents(model.load())
+
+
+class Bnd4ArchiveTest(unittest.TestCase):
+    def check_archive(self, archive, files, format):
+        hasNames = format & 0x0C
+        self.assertEqual(archive.format, format)
+        self.assertEqual(len(archive.entries), len(files))
+        for entry, (fileId, name, data) in zip(archive.entries, files):
+            self.assertEqual(bytes(archive.data(entry)), data)
+            self.assertEqual(entry.name, name if hasNames else None)
+            if format & 0x02 or format == 0x04:
+                self.assertEqual(entry.id, fileId)
+
+        flvers = archive.flvers()
+        self.assertEqual([entry.index for entry in flvers], [0, 1, 2])
+        expected = [direct_contents(data) for fileId, name, data in files[:3]]
+        for workers in (None, 4):
+            models = archive.load_models(workers=workers)
+            try:
+                self.assertEqual([model_contents(model) for model in models], expected)
+            finally:
+                for model in models:
+                    model.close()
+
+    def test_layouts(self):
+        for unicode in (True, False):
+            files = flver_members(unicode)
+            for endianness in ('little', 'big'):
+                for bitBigEndian in (False, True):
+                    for format in FORMATS:
+                        with self.subTest(unicode=unicode, endianness=endianness, bitBigEndian=bitBigEndian,
+                                          format=hex(format)):
+                            data = write_bnd4(files, endianness, format, bitBigEndian, unicode)
+                            with Bnd4Archive(data) as archive:
+                                self.assertEqual(archive.bigEndian, endianness == 'big')
+                                self.assertEqual(archive.bitBigEndian, bitBigEndian)
+                                self.assertEqual(archive.unicode, unicode)
+                                self.check_archive(archive, files, format)
+
+    def test_dcx_archive(self):
+        files = flver_members(True)
+        data = write_dcx(write_bnd4(files, 'big', 0x74, True))
+        with Bnd4Archive(data) as archive:
+            self.check_archive(archive, files, 0x74)
+
+    def test_file(self):
+        files = flver_members(False)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'c1000.chrbnd.dcx')
+            with open(path, 'wb') as stream:
+                stream.write(write_dcx(write_bnd4(files, unicode=False)))
+            with Bnd4Archive(path) as archive:
+                self.check_archive(archive, files, 0x2E)
+                model = archive.open_model(archive.flvers()[0])
+                self.assertEqual(model.path, path + ':' + files[0][1])
+                model.close()
+
+    def test_not_bnd4(self):
+        with self.assertRaises(Exception):
+            Bnd4Archive(write_flver(FlverSpec(vertexCount=10, indexCount=30)))
+
+
+if __name__ == '__main__':
+    unittest.main()
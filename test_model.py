@@ -0,0 +1,32 @@
+import unittest
+
+import reader
+from model import FlverModel
+from test_bnd4 import model_contents
+from writer import FlverSpec, write_flver
+
+
+class LoadTest(unittest.TestCase):
+    def test_threads(self):
+        numpy = reader.numpy
+        files = [
+            write_flver(FlverSpec(vertexCount=2000, indexCount=3000, meshCount=6, seed=1)),
+            write_flver(FlverSpec('big', 0x20010, vertexCount=1500, indexCount=3000, meshCount=5, indexSize=32,
+                                  seed=2)),
+            write_flver(FlverSpec(vertexCount=1000, indexCount=999, meshCount=4, triangleStrip=True, seed=3)),
+        ]
+        try:
+            for path in ('numpy', 'struct') if numpy is not None else ('struct',):
+                reader.numpy = numpy if path == 'numpy' else None
+                for index, data in enumerate(files):
+                    with FlverModel(data) as model:
+                        expected = model_contents(model.load())
+                    for workers in (2, 4, 8):
+                        with self.subTest(path=path, file=index, workers=workers), FlverModel(data) as model:
+                            self.assertEqual(model_contents(model.load(workers=workers)), expected)
+        finally:
+            reader.numpy = numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
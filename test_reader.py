@@ -0,0 +1,84 @@
+import unittest
+
+import reader
+from model import FlverModel
+from reader import BufferLayoutMember as Member
+from writer import FlverSpec, write_flver
+
+LAYOUTS = [
+    [(Member.Float3, Member.Position), (Member.Byte4A, Member.Normal), (Member.Byte4B, Member.Tangent),
+     (Member.Byte4C, Member.BoneWeights), (Member.Byte4B, Member.BoneIndices), (Member.Short2toFloat2, Member.UVSemantic),
+     (Member.UVPair, Member.UVSemantic), (Member.Byte4C, Member.VertexColor)],
+    [(Member.Float3, Member.Position), (Member.Float4, Member.Normal), (Member.Short4toFloat4A, Member.BoneWeights),
+     (Member.ShortBoneIndices, Member.BoneIndices), (Member.Float2, Member.UVSemantic), (Member.Float3, Member.UVSemantic),
+     (Member.Short4toFloat4B, Member.UVSemantic), (Member.Float4, Member.VertexColor),
+     (Member.Byte4C, Member.UnknownVector4A)],
+    [(Member.Float3, Member.Position), (Member.Short4toFloat4B, Member.Normal), (Member.Byte4E, Member.BoneIndices),
+     (Member.UVType, Member.UVSemantic), (Member.Byte4A, Member.VertexColor), (Member.Byte4C, Member.Tangent)],
+]
+VERSIONS = (0x2001A, 0x20014, 0x20010, 0x20007)
+
+
+def reference_vertices(model, mesh):
+    """
+    Flat attribute lists of `mesh` as `FlvReader.read_vertex` reads them, one vertex at a time.
+    """
+    br = model.reader
+    attributes = {'positions': [], 'boneWeights': [], 'boneIndices': [], 'normals': [], 'tangents': {}, 'uvs': {},
+                  'colors': {}}
+    for vertexBuffer in mesh.vertexBuffers:
+        layout = model.bufferLayouts[vertexBuffer.layoutIndex]
+        br.step_in(model.dataOffset + vertexBuffer.bufferOffset)
+        for index in range(vertexBuffer.vertexCount):
+            positions, boneWeights, boneIndices, normals, tangents, uvs, colors = br.read_vertex(
+                layout, vertexBuffer.vertexSize, model.version)
+            attributes['positions'] += [value for vector in positions for value in (vector.x, vector.y, vector.z)]
+            attributes['boneWeights'] += boneWeights
+            attributes['boneIndices'] += boneIndices
+            attributes['normals'] += [value for normal in normals for value in normal]
+            for name, vectors, fields in (('tangents', tangents, 'xyzw'), ('uvs', uvs, 'xyz'), ('colors', colors, 'argb')):
+                for channel, vector in enumerate(vectors):
+                    attributes[name].setdefault(channel, []).extend(getattr(vector, field) for field in fields)
+        br.step_out()
+    for name in ('tangents', 'uvs', 'colors'):
+        attributes[name] = [attributes[name][channel] for channel in sorted(attributes[name])]
+    return attributes
+
+
+class VertexDecoderTest(unittest.TestCase):
+    def assert_close(self, values, expected):
+        values = list(values) if values is not None else []
+        self.assertEqual(len(values), len(expected))
+        for value, reference in zip(values, expected):
+            # the decoder stores float32, read_vertex keeps doubles
+            self.assertAlmostEqual(value, reference, delta=abs(reference) * 1e-6 + 1e-6)
+
+    def check(self, data):
+        with FlverModel(data) as model:
+            for mesh in model.load().meshes:
+                vertexData = mesh.vertexData
+                expected = reference_vertices(model, mesh)
+                for name in ('positions', 'boneWeights', 'boneIndices', 'normals'):
+                    self.assert_close(getattr(vertexData, name), expected[name])
+                for name in ('tangents', 'uvs', 'colors'):
+                    self.assertEqual(len(getattr(vertexData, name)), len(expected[name]))
+                    for values, reference in zip(getattr(vertexData, name), expected[name]):
+                        self.assert_close(values, reference)
+
+    def test_read_vertex(self):
+        numpy = reader.numpy
+        try:
+            for path in ('numpy', 'struct') if numpy is not None else ('struct',):
+                reader.numpy = numpy if path == 'numpy' else None
+                for endianness in ('little', 'big'):
+                    for version in VERSIONS:
+                        for index, layout in enumerate(LAYOUTS):
+                            with self.subTest(path=path, endianness=endianness, version=hex(version), layout=index):
+                                self.check(write_flver(FlverSpec(endianness, version, vertexCount=50, indexCount=30,
+                                                                 layouts=[layout], seed=index)))
+        finally:
+            reader.numpy = numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from array import array
+
+import skin
+from model import FlverModel
+from writer import FlverSpec, write_flver
+
+
+def skin_contents(skinData):
+    return (skinData.vertexCount, bytes(skinData.boneIndices), bytes(skinData.boneWeights), skinData.indexType,
+            skinData.weightType)
+
+
+class BuildSkinTest(unittest.TestCase):
+    def test_negative_weights(self):
+        numpy = skin.numpy
+        try:
+            for path in ('numpy', 'stdlib') if numpy is not None else ('stdlib',):
+                skin.numpy = numpy if path == 'numpy' else None
+                with self.subTest(path=path):
+                    self.assertEqual(skin.normalize_weights([0.5, -0.49, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+                                     [1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+        finally:
+            skin.numpy = numpy
+
+    def test_numpy(self):
+        numpy = skin.numpy
+        if numpy is None:
+            self.skipTest('NumPy is not installed')
+        with FlverModel(write_flver(FlverSpec(vertexCount=500, indexCount=300, meshCount=3, boneCount=40))) as model:
+            meshes = model.load().meshes
+        meshes[0].vertexData.boneWeights[:8] = array('f', [0.5, -0.49, 0.0, 0.0, -1.0, 0.0, 0.0, 0.0])
+        for options in ({}, {'threshold': 0.2}, {'weightType': 'float16'}, {'indexType': 'uint16'}):
+            with self.subTest(**options):
+                batched = [skin_contents(skin.build_skin(mesh, **options)) for mesh in meshes]
+                try:
+                    skin.numpy = None
+                    self.assertEqual([skin_contents(skin.build_skin(mesh, **options)) for mesh in meshes], batched)
+                finally:
+                    skin.numpy = numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
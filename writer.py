@@ -0,0 +1,317 @@
+import random
+import struct
+import sys
+import zlib
+from array import array
+
+from bnd4 import Bnd4Format, Bnd4Records, MAGIC as BND4_MAGIC
+from dcx import DcxHeader, MAGIC as DCX_MAGIC
+from reader import BufferLayoutMember, FlvRecords, VertexDecoder
+
+DEFAULT_LAYOUT = [
+    (BufferLayoutMember.Float3, BufferLayoutMember.Position),
+    (BufferLayoutMember.Byte4A, BufferLayoutMember.Normal),
+    (BufferLayoutMember.Byte4B, BufferLayoutMember.Tangent),
+    (BufferLayoutMember.Byte4C, BufferLayoutMember.BoneWeights),
+    (BufferLayoutMember.Byte4B, BufferLayoutMember.BoneIndices),
+    (BufferLayoutMember.Short2toFloat2, BufferLayoutMember.UVSemantic),
+    (BufferLayoutMember.Byte4C, BufferLayoutMember.VertexColor),
+]
+
+
+class FlverSpec:
+    """
+    Description of a synthetic FLVER: table sizes, vertex layouts and encoding. Every mesh gets one vertex buffer
+    per entry of `layouts` (1 to 3), each layout being a list of (type, semantic) `BufferLayoutMember` pairs,
+    and one face set per entry of `faceSetFlags`.
+    """
+    def __init__(self, endianness='little', version=0x2001A, meshCount=1, boneCount=1, materialCount=1,
+                 dummyCount=0, texturesPerMaterial=0, vertexCount=1000, indexCount=3000, indexSize=16,
+                 faceSetFlags=(0,), triangleStrip=False, layouts=None, gxSections=1, seed=0):
+        self.endianness = endianness
+        self.version = version
+        self.meshCount = meshCount
+        self.boneCount = boneCount
+        self.materialCount = materialCount
+        self.dummyCount = dummyCount
+        self.texturesPerMaterial = texturesPerMaterial
+        self.vertexCount = vertexCount
+        self.indexCount = indexCount
+        self.indexSize = indexSize
+        self.faceSetFlags = list(faceSetFlags)
+        self.triangleStrip = triangleStrip
+        self.layouts = layouts if layouts is not None else [DEFAULT_LAYOUT]
+        self.gxSections = gxSections
+        self.seed = seed
+
+
+class DataBlock:
+    def __init__(self, offset):
+        self.offset = offset
+        self.data = bytearray()
+
+    def add(self, data, alignment=4):
+        self.data += bytes(-len(self.data) % alignment)
+        offset = self.offset + len(self.data)
+        self.data += data
+        return offset
+
+    def end(self):
+        return self.offset + len(self.data)
+
+
+def member_format(type, semantic):
+    member = BufferLayoutMember()
+    member.type = type
+    member.semantic = semantic
+    return VertexDecoder.member_format(member) or '%dB' % member.size()
+
+
+def random_member_values(rng, fmt, semantic, boneCount):
+    count = int(fmt[:-1])
+    code = fmt[-1]
+    if semantic == BufferLayoutMember.BoneIndices:
+        return [rng.randrange(min(boneCount, 256)) for i in range(count)]
+    if code == 'f':
+        values = [rng.uniform(-1, 1) for i in range(count)]
+    elif code == 'B':
+        values = [rng.randrange(256) for i in range(count)]
+    elif code == 'b':
+        values = [rng.randrange(-128, 128) for i in range(count)]
+    elif code == 'h':
+        values = [rng.randrange(-32768, 32768) for i in range(count)]
+    else:
+        values = [rng.randrange(65536) for i in range(count)]
+    if semantic == BufferLayoutMember.UVSemantic and fmt == '4h':
+        values[3] = 0
+    return values
+
+
+def build_vertex_buffer(rng, endian, layout, vertexCount, boneCount, distinctVertices=1024):
+    """
+    Vertex buffer of `vertexCount` vertices cycling through `distinctVertices` random ones.
+    """
+    vertex = struct.Struct(endian + ''.join(member_format(type, semantic) for type, semantic in layout))
+    vertices = bytearray()
+    for i in range(min(vertexCount, distinctVertices)):
+        values = []
+        for type, semantic in layout:
+            values += random_member_values(rng, member_format(type, semantic), semantic, boneCount)
+        vertices += vertex.pack(*values)
+    size = vertex.size * vertexCount
+    repeats = -(-size // len(vertices)) if vertices else 0
+    return vertex.size, bytes(vertices * repeats)[:size]
+
+
+def build_indices(rng, endian, vertexCount, indexCount, indexSize):
+    indices = array('H' if indexSize in (0, 16) else 'I', [rng.randrange(vertexCount) for i in range(indexCount)])
+    if (endian == '>') != (sys.byteorder == 'big'):
+        indices.byteswap()
+    return indices.tobytes()
+
+
+def build_bone_links(boneCount):
+    """
+    Parent, first child, next and previous sibling indices of a binary tree of `boneCount` bones.
+    """
+    parents = [(i - 1) // 2 for i in range(boneCount)]
+    children = [[] for i in range(boneCount)]
+    for i in range(1, boneCount):
+        children[parents[i]].append(i)
+    links = []
+    for i in range(boneCount):
+        siblings = children[parents[i]] if i > 0 else [0]
+        position = siblings.index(i)
+        links.append((
+            parents[i],
+            children[i][0] if children[i] else -1,
+            siblings[position + 1] if position + 1 < len(siblings) else -1,
+            siblings[position - 1] if position > 0 else -1,
+        ))
+    return links
+
+
+def write_flver(spec):
+    """
+    Build the bytes of a FLVER file following `spec`.
+    """
+    rng = random.Random(spec.seed)
+    endian = '>' if spec.endianness == 'big' else '<'
+    records = FlvRecords.get(endian)
+    version = spec.version
+    faceSetCount = spec.meshCount * len(spec.faceSetFlags)
+    vertexBufferCount = spec.meshCount * len(spec.layouts)
+    textureCount = spec.materialCount * spec.texturesPerMaterial
+
+    def encode(text):
+        return text.encode('utf-16be' if endian == '>' else 'utf-16le') + b'\x00\x00'
+
+    tableSizes = [
+        records.header.codec.size + 8,
+        records.dummy.codec.size * spec.dummyCount,
+        records.material.codec.size * spec.materialCount,
+        records.bone.codec.size * spec.boneCount,
+        records.mesh(version).codec.size * spec.meshCount,
+        records.faceSet.codec.size * faceSetCount,
+        records.vertexBuffer.codec.size * vertexBufferCount,
+        records.bufferLayout.codec.size * len(spec.layouts),
+        records.texture.codec.size * textureCount,
+        records.sekiroUnk.codec.size if version >= 0x2001A else 0,
+    ]
+    extra = DataBlock(sum(tableSizes))
+    data = DataBlock(0)
+
+    dummies = bytearray()
+    for i in range(spec.dummyCount):
+        dummies += records.dummy.codec.pack(
+            rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1), 0, 0, 0,
+            0, 0, 1, 100 + i, -1, 0, 1, 0, i % max(spec.boneCount, 1), False, True, 0, 0, 0, 0)
+
+    materials = bytearray()
+    textures = bytearray()
+    for i in range(spec.materialCount):
+        gxOffset = 0
+        if spec.gxSections > 0:
+            gx = bytearray()
+            for section in range(spec.gxSections):
+                payload = bytes(4 * rng.randrange(1, 8))
+                gx += struct.pack(endian + '3i', section, 100, len(payload) + 0xC) + payload
+            gx += struct.pack(endian + '3i', 0x7FFFFFFF, 100, 0xC)
+            gxOffset = extra.add(bytes(gx))
+        materials += records.material.codec.pack(
+            extra.add(encode('Material_%d' % i)), extra.add(encode('N:\\FDP\\data\\Material\\mtd\\M[ARSN]_%d.mtd' % (i % 4))),
+            spec.texturesPerMaterial, i * spec.texturesPerMaterial, 0, gxOffset, 0, 0)
+        for t in range(spec.texturesPerMaterial):
+            textures += records.texture.codec.pack(
+                extra.add(encode('N:\\FDP\\data\\Model\\tex\\t%d_%d.tga' % (i, t))), extra.add(encode('g_DiffuseTexture')),
+                1.0, 1.0, 1, True, 0, 0, 0, 0, 0)
+
+    bones = bytearray()
+    for i, (parent, child, nextSibling, previousSibling) in enumerate(build_bone_links(spec.boneCount)):
+        bones += records.bone.codec.pack(
+            rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1), extra.add(encode('Bone_%d' % i)),
+            rng.uniform(-3.14, 3.14), rng.uniform(-3.14, 3.14), rng.uniform(-3.14, 3.14), parent, child,
+            1, 1, 1, nextSibling, previousSibling, -1, -1, -1, 0, 1, 1, 1, *([0] * 13))
+
+    layouts = bytearray()
+    for layout in spec.layouts:
+        members = bytearray()
+        structOffset = 0
+        for index, (type, semantic) in enumerate(layout):
+            members += records.bufferLayoutMember.codec.pack(0, structOffset, type, semantic, index)
+            structOffset += struct.calcsize(member_format(type, semantic))
+        layouts += records.bufferLayout.codec.pack(len(layout), 0, 0, extra.add(bytes(members)))
+
+    meshes = bytearray()
+    faceSets = bytearray()
+    vertexBuffers = bytearray()
+    meshBoneCount = min(spec.boneCount, 28)
+    for m in range(spec.meshCount):
+        faceSetIndices = []
+        for flags in spec.faceSetFlags:
+            indexBytes = build_indices(rng, endian, spec.vertexCount, spec.indexCount, spec.indexSize)
+            faceSetIndices.append(len(faceSets) // records.faceSet.codec.size)
+            faceSets += records.faceSet.codec.pack(
+                flags, spec.triangleStrip, True, 0, 0, spec.indexCount, data.add(indexBytes, 16), len(indexBytes),
+                0, spec.indexSize, 0)
+
+        vertexBufferIndices = []
+        for layoutIndex, layout in enumerate(spec.layouts):
+            vertexSize, vertexBytes = build_vertex_buffer(rng, endian, layout, spec.vertexCount, max(meshBoneCount, 1))
+            vertexBufferIndices.append(len(vertexBuffers) // records.vertexBuffer.codec.size)
+            vertexBuffers += records.vertexBuffer.codec.pack(
+                layoutIndex, layoutIndex, vertexSize, spec.vertexCount, 0, 0, len(vertexBytes), data.add(vertexBytes, 16))
+
+        values = [True, 0, 0, 0, m % max(spec.materialCount, 1), 0]
+        if version <= 0x20010:
+            values.append(0)
+        values += [-1, meshBoneCount, 0]
+        if version >= 0x20013:
+            box = [-1.0, -1.0, -1.0, 1.0, 1.0, 1.0] + ([0.0, 0.0, 0.0] if version >= 0x2001A else [])
+            values.append(extra.add(struct.pack(endian + '%df' % len(box), *box)))
+        values += [
+            extra.add(struct.pack(endian + '%di' % meshBoneCount, *range(meshBoneCount))),
+            len(faceSetIndices), extra.add(struct.pack(endian + '%di' % len(faceSetIndices), *faceSetIndices)),
+            len(vertexBufferIndices), extra.add(struct.pack(endian + '%di' % len(vertexBufferIndices), *vertexBufferIndices)),
+        ]
+        meshes += records.mesh(version).codec.pack(*values)
+
+    sekiroUnk = b''
+    if version >= 0x2001A:
+        member = records.sekiroUnkMember.codec.pack(0, 0, 0, 0, 0, 0)
+        sekiroUnk = records.sekiroUnk.codec.pack(1, 1, extra.add(member), extra.add(member), 0, 0, 0, 0, 0)
+
+    dataOffset = extra.end() + (-extra.end() % 16)
+    header = records.header.codec.pack(
+        version, dataOffset, data.end(), spec.dummyCount, spec.materialCount, spec.boneCount, spec.meshCount,
+        vertexBufferCount, -1, -1, -1, 1, 1, 1, 0, faceSetCount * spec.indexCount // 3, 0, True, False, 0, 0, -1,
+        faceSetCount, len(spec.layouts), textureCount, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    result = bytearray(b'FLVER\x00' + (b'B\x00' if endian == '>' else b'L\x00'))
+    for table in (header, dummies, materials, bones, meshes, faceSets, vertexBuffers, layouts, textures, sekiroUnk):
+        result += table
+    if len(result) != extra.offset:
+        raise Exception('Table size mismatch: expected {} bytes, got {}'.format(extra.offset, len(result)))
+    result += extra.data
+    result += bytes(dataOffset - len(result))
+    result += data.data
+    return bytes(result)
+
+
+def write_flver_file(path, spec):
+    data = write_flver(spec)
+    with open(path, 'wb') as stream:
+        stream.write(data)
+    return len(data)
+
+
+def write_dcx(data, level=9):
+    """
+    Wrap `data` in a DFLT DCX container.
+    """
+    compressed = zlib.compress(data, level)
+    header = DcxHeader.codec.pack(
+        DCX_MAGIC, 0x10000, 0x18, 0x24, 0x44, DcxHeader.codec.size, b'DCS\x00', len(data), len(compressed),
+        b'DCP\x00', b'DFLT', 0x20, level, 0, 0, 0, 0, 0, 0, 0x00010100, b'DCA\x00', 8)
+    return header + compressed
+
+
+def write_bnd4(files, endianness='little', format=0x2E, bitBigEndian=False, unicode=True, version='07D7R6'):
+    """
+    Build a BND4 archive of `files`, a list of (id, name, data) members, laid out like the game archives: file
+    headers, then the names, then the member data aligned to 16 bytes.
+    """
+    endian = '>' if endianness == 'big' else '<'
+    records = Bnd4Records.get(endian)
+    fileHeader = records.fileHeader(format)
+    namesOffset = records.header.codec.size + fileHeader.codec.size * len(files)
+    names = DataBlock(namesOffset)
+    nameOffsets = [names.add(name.encode(('utf-16be' if endian == '>' else 'utf-16le') if unicode else 'shift_jis')
+                             + bytes(2 if unicode else 1), 2) for fileId, name, data in files]
+    data = DataBlock(names.end() + (-names.end() % 16))
+    dataOffsets = [data.add(fileData, 16) for fileId, name, fileData in files]
+
+    storedFormat = format if bitBigEndian or (format & 0x01 and not format & 0x80) else Bnd4Format.reverse_bits(format)
+    storedFlags = 0x40 if bitBigEndian else Bnd4Format.reverse_bits(0x40)
+    header = records.header.codec.pack(
+        BND4_MAGIC, False, True, 0, 0, 0, endianness == 'big', not bitBigEndian, 0, len(files), 0x40,
+        version.encode('ascii'), fileHeader.codec.size, names.end(), unicode, storedFormat, 0, 0, 0, 0)
+    headers = bytearray()
+    for (fileId, name, fileData), nameOffset, dataOffset in zip(files, nameOffsets, dataOffsets):
+        values = [storedFlags, 0, 0, 0, -1, len(fileData)]
+        if format & Bnd4Format.Compression:
+            values.append(len(fileData))
+        values.append(dataOffset)
+        if format & Bnd4Format.IDs:
+            values.append(fileId)
+        if format & (Bnd4Format.Names1 | Bnd4Format.Names2):
+            values.append(nameOffset)
+        if format == Bnd4Format.Names1:
+            values += [fileId, 0]
+        headers += fileHeader.codec.pack(*values)
+
+    result = bytearray(header + headers)
+    result += names.data
+    result += bytes(data.offset - len(result))
+    result += data.data
+    return bytes(result)